@@ -1,4 +1,6 @@
+import sys
 from datetime import timedelta
+
 from decouple import config
 from pathlib import Path
 
@@ -39,6 +41,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'shared.db_router.ReplicaRoutingMiddleware',  # GET lar replikaga, yozishdan keyin primary ga
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -54,12 +57,27 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated'
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
+        'users.authentication.CachedJWTAuthentication',  # Bearer tokenlar, user keshdan olinadi
         'rest_framework.authentication.TokenAuthentication',
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
     ],
     'DEFAULT_RENDERER_CLASSES': [
         'rest_framework.renderers.JSONRenderer',
     ],
+    'NUM_PROXIES': config('NUM_PROXIES', default=0, cast=int),  # nginx ortida bolsa 1, throttle IP ni shundan oladi
+}
+
+# shared.throttling: '<view.throttle_scope>.<ip|user|target>'
+THROTTLE_RATES = {
+    'signup.ip': config('THROTTLE_SIGNUP_IP', default='20/hour'),
+    'signup.target': config('THROTTLE_SIGNUP_TARGET', default='5/hour'),  # bitta email/telefonga
+    'verify.ip': config('THROTTLE_VERIFY_IP', default='30/min'),
+    'verify.user': config('THROTTLE_VERIFY_USER', default='10/min'),
+    'forgot.ip': config('THROTTLE_FORGOT_IP', default='20/hour'),
+    'forgot.target': config('THROTTLE_FORGOT_TARGET', default='5/hour'),
+    'login.ip': config('THROTTLE_LOGIN_IP', default='30/min'),
+    'login.target': config('THROTTLE_LOGIN_TARGET', default='10/min'),  # bitta akkauntga parol terish
+    'like.user': config('THROTTLE_LIKE_USER', default='120/min'),
+    'like.target': config('THROTTLE_LIKE_TARGET', default='30/min'),  # bitta postni like/unlike qilaverish
 }
 
 SIMPLE_JWT = {
@@ -125,6 +143,11 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# ulanishlar: har requestda postgresga qayta ulanmaslik un CONN_MAX_AGE sekund ochiq turadi,
+# CONN_HEALTH_CHECKS uzilib qolgan ulanishni request boshida tekshirib yangilaydi
+# ko'p process/worker bolsa pool pgbouncer (transaction mode) da qilinadi: HOST/PORT pgbouncerga qaraydi,
+# DB_PGBOUNCER=True. Uning ortida server-side cursorlar ishlamaydi, shuning un ochiriladi
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql_psycopg2',
@@ -132,10 +155,76 @@ DATABASES = {
         'USER': config('USER'),
         'PASSWORD': config('PASSWORD'),
         'HOST': config('HOST'),
-        'PORT': config('PORT')
+        'PORT': config('PORT'),
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+        'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
+        'DISABLE_SERVER_SIDE_CURSORS': config('DB_PGBOUNCER', default=False, cast=bool),
+        'OPTIONS': {
+            'connect_timeout': config('DB_CONNECT_TIMEOUT', default=5, cast=int),
+        },
     }
 }
 
+# read replikalar: DB_REPLICAS="replica1.host:3,replica2.host:1" (host:og'irlik), qolgan sozlamalar default dan
+# shared.db_router GET requestlardagi oqishlarni ularga og'irligi boyicha yuboradi
+
+DATABASE_REPLICAS = {}
+for number, replica in enumerate(config('DB_REPLICAS', default='', cast=lambda v: [r for r in v.split(',') if r])):
+    host, _, weight = replica.strip().partition(':')
+    alias = f'replica_{number + 1}'
+    DATABASES[alias] = {
+        **DATABASES['default'], 'HOST': host, 'OPTIONS': dict(DATABASES['default']['OPTIONS']), 'TEST': {'MIRROR': 'default'}
+    }
+    DATABASE_REPLICAS[alias] = int(weight or 1)
+
+DATABASE_ROUTERS = ['shared.db_router.ReplicaRouter']
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=5, cast=int)  # replikatsiya kechikishidan kop bolsin
+
+# Cache
+# django-redis ishlatiladi, REDIS_URL berilmasa (test, lokal) locmem
+
+REDIS_URL = config('REDIS_URL', default='')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': REDIS_URL,
+            'OPTIONS': {
+                'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            }
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+POST_CACHE_TTL = config('POST_CACHE_TTL', default=60, cast=int)  # sekund
+AUTH_USER_CACHE_TTL = config('AUTH_USER_CACHE_TTL', default=300, cast=int)  # JWT user yozuvi, redisda
+AUTH_USER_LOCAL_CACHE_TTL = config('AUTH_USER_LOCAL_CACHE_TTL', default=10, cast=int)  # process ichida
+FEED_CACHE_TTL = config('FEED_CACHE_TTL', default=30, cast=int)
+
+# Home feed
+# shundan kop followeri bor authorlar postlari timelinega yozilmaydi, oqishda qoshiladi
+
+TIMELINE_FANOUT_LIMIT = config('TIMELINE_FANOUT_LIMIT', default=5000, cast=int)
+TIMELINE_BACKFILL_SIZE = config('TIMELINE_BACKFILL_SIZE', default=50, cast=int)
+
+# refresh token blacklist: process ichidagi Bloom filter qancha vaqtda yangilanadi
+JWT_BLACKLIST_SYNC_SECONDS = config('JWT_BLACKLIST_SYNC_SECONDS', default=5, cast=int)
+JWT_BLACKLIST_REBUILD_SECONDS = config('JWT_BLACKLIST_REBUILD_SECONDS', default=3600, cast=int)
+JWT_BLACKLIST_BLOOM_CAPACITY = config('JWT_BLACKLIST_BLOOM_CAPACITY', default=100000, cast=int)
+
+# tasdiqlash kodlari: redis bolsa kalitlarda (TTL bilan), bolmasa UserConfirmation jadvalida
+VERIFY_CODE_STORE = config(
+    'VERIFY_CODE_STORE',
+    default='users.verification.CacheCodeStore' if REDIS_URL else 'users.verification.DatabaseCodeStore'
+)
+VERIFY_CODE_MAX_ATTEMPTS = config('VERIFY_CODE_MAX_ATTEMPTS', default=5, cast=int)
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -154,6 +243,29 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing
+# PASSWORD_HASHER: pbkdf2, scrypt, argon2 yoki md5 (faqat testlar uchun, tez)
+# Birinchisi yangi hashlar uchun, qolganlari eski hashlarni tekshiradi va login paytida yangilanadi
+# manage.py test da (env da boshqasi berilmasa) md5, testlar PBKDF2 ni kutib sekinlashmasin
+
+TESTING = len(sys.argv) > 1 and sys.argv[1] == 'test'
+PASSWORD_HASHER = config('PASSWORD_HASHER', default='md5' if TESTING else 'pbkdf2')
+PASSWORD_PBKDF2_ITERATIONS = config('PASSWORD_PBKDF2_ITERATIONS', default=600000, cast=int)
+PASSWORD_SCRYPT_WORK_FACTOR = config('PASSWORD_SCRYPT_WORK_FACTOR', default=2 ** 14, cast=int)
+PASSWORD_ARGON2_TIME_COST = config('PASSWORD_ARGON2_TIME_COST', default=2, cast=int)
+PASSWORD_ARGON2_MEMORY_COST = config('PASSWORD_ARGON2_MEMORY_COST', default=102400, cast=int)  # KiB
+PASSWORD_ARGON2_PARALLELISM = config('PASSWORD_ARGON2_PARALLELISM', default=8, cast=int)
+
+HASHERS_BY_NAME = {
+    'pbkdf2': 'shared.hashers.TunedPBKDF2PasswordHasher',
+    'scrypt': 'shared.hashers.TunedScryptPasswordHasher',
+    'argon2': 'shared.hashers.TunedArgon2PasswordHasher',
+}
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.MD5PasswordHasher' if PASSWORD_HASHER == 'md5' else HASHERS_BY_NAME[PASSWORD_HASHER],
+    *[hasher for name, hasher in HASHERS_BY_NAME.items() if name != PASSWORD_HASHER],
+]
+
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
 
@@ -179,3 +291,8 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTH_USER_MODEL = 'users.User'
 
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+
+# SMS: shared.sms.TwilioSMSBackend, ConsoleSMSBackend, FileSMSBackend yoki LocMemSMSBackend
+SMS_BACKEND = config('SMS_BACKEND', default='shared.sms.ConsoleSMSBackend')
+SMS_FROM_NUMBER = config('SMS_FROM_NUMBER', default='+9981234567')
+SMS_FILE_PATH = config('SMS_FILE_PATH', default=str(BASE_DIR / 'sms.log'))
@@ -0,0 +1,181 @@
+import asyncio
+import binascii
+import uuid
+from base64 import b64decode, b64encode
+from collections import defaultdict
+from urllib import parse
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.db.models import Q
+from django.http import JsonResponse
+from django.utils.dateparse import parse_datetime
+from django.views import View
+from rest_framework.exceptions import APIException, NotFound
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from shared.db_router import use_primary
+from . import caching
+from .models import Post, Comment, CommentLike, PostLike
+from .serializers import PostSerializer, CommentSerializer
+from .timeline import before_filter
+
+# ASGI da thread hop larsiz ishlaydigan faqat-oqish endpointlari (DRF 3.14 async viewlarni qollamaydi)
+# sync viewlar bilan bir xil javob qaytaradi; yozish endpointlari sync qoladi
+
+
+async def get_user(request):  # token bolmasa bazaga ham, threadga ham bormaydi
+    if 'HTTP_AUTHORIZATION' not in request.META:
+        return AnonymousUser()
+    drf_request = Request(request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+    return await sync_to_async(lambda: drf_request.user)()  # user odatda keshdan (users.authentication)
+
+
+def error_response(message, status=400):
+    return JsonResponse({"success": False, "message": message}, status=status)
+
+
+def get_number_param(request, name, default=None):
+    value = request.GET.get(name)
+    if value is None:
+        return default
+    if not value.isdigit():
+        raise ValueError(f"{name} musbat son bolishi kerak")
+    return int(value)
+
+
+class AsyncReadView(View):
+    http_method_names = ['get']
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            request.user = await get_user(request)
+            return await super(AsyncReadView, self).dispatch(request, *args, **kwargs)
+        except APIException as exc:  # notogri yoki eskirgan token
+            return JsonResponse({"detail": exc.detail}, status=exc.status_code)
+        except ValueError as exc:  # notogri query parametr
+            return error_response(str(exc))
+
+
+class AsyncPostListView(AsyncReadView):
+    # PostListView (CustomCursorPagination) bilan bir xil javob: next, previous, results va count,
+    # kursor (created_time, id) kaliti, bir xil vaqtli postlar tushib ham, takrorlanib ham qolmaydi
+    page_size = 10
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    skip_count_query_param = 'skip_count'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def decode_cursor(self, request):  # (created_time, id), reverse
+        encoded = request.GET.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+        try:
+            query = parse.parse_qs(b64decode(encoded.encode('ascii')).decode('ascii'))
+            created_time, post_id = query['p'][0].split('|')
+            position = (parse_datetime(created_time), uuid.UUID(post_id))
+            reverse = bool(int(query.get('r', ['0'])[0]))
+        except (KeyError, ValueError, UnicodeError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        if position[0] is None:
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, request, post, reverse):
+        query = {'p': f'{post.created_time.isoformat()}|{post.id}'}
+        if reverse:
+            query['r'] = '1'
+        encoded = b64encode(parse.urlencode(query).encode('ascii')).decode('ascii')
+        return replace_query_param(request.build_absolute_uri(), self.cursor_query_param, encoded)
+
+    async def get(self, request, *args, **kwargs):
+        position, reverse = self.decode_cursor(request)
+        page_size = max(1, min(get_number_param(request, 'page_size', self.page_size), self.max_page_size))
+
+        if not request.user.is_authenticated:  # faqat anonim pagelar keshlanadi
+            data = await sync_to_async(caching.get_feed_page)(request)
+            if data is not None:
+                return JsonResponse(data)
+            use_primary()  # keshga replikadagi eski page yozilmasin
+
+        posts = Post.objects.for_feed(request.user)
+        count = None
+        if request.GET.get(self.skip_count_query_param, '').lower() not in ('1', 'true'):
+            count = await posts.acount()
+        if reverse:  # previous link: kursordan yangilari, teskari tartibda olib keyin aylantiriladi
+            posts = posts.order_by('created_time', 'id')
+            created_time, post_id = position
+            posts = posts.filter(Q(created_time__gt=created_time) | Q(created_time=created_time, id__gt=post_id))
+        else:
+            posts = posts.order_by('-created_time', '-id')
+            if position is not None:
+                posts = posts.filter(before_filter('created_time', 'id', position))
+        posts = [post async for post in posts[:page_size + 1]]  # +1: keyingi page bormi
+        has_more = len(posts) > page_size
+        posts = posts[:page_size]
+        if reverse:
+            posts.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, position is not None
+
+        data = {
+            "next": self.encode_cursor(request, posts[-1], False) if has_next and posts else None,
+            "previous": self.encode_cursor(request, posts[0], True) if has_previous and posts else None,
+            "results": PostSerializer(posts, many=True, context={'request': request}).data
+        }
+        if count is not None:
+            data["count"] = count  # umumiy soni
+        if not request.user.is_authenticated:
+            await sync_to_async(caching.set_feed_page)(request, data)
+        return JsonResponse(data)
+
+
+class AsyncPostDetailView(AsyncReadView):  # PostRetrieveUpdateDestroyView GET
+
+    async def get(self, request, pk, *args, **kwargs):
+        data = await sync_to_async(caching.get_post_detail)(pk)
+        if data is not None:  # me_liked keshga kirmaydi, keshdan olinganda alohida tekshiriladi
+            data['me_liked'] = request.user.is_authenticated and \
+                await PostLike.objects.filter(post_id=pk, author=request.user).aexists()
+            return JsonResponse(data)
+        # keshda yoq: for_feed me_liked ni shu query ichida hisoblaydi
+        use_primary()
+        try:
+            post = await Post.objects.for_feed(request.user).aget(pk=pk)
+        except Post.DoesNotExist:
+            return JsonResponse({"detail": "Not found."}, status=404)
+        data = PostSerializer(post, context={'request': request}).data
+        await sync_to_async(caching.set_post_detail)(pk, data)
+        return JsonResponse(data)
+
+
+class AsyncPostCommentListView(AsyncReadView):  # PostCommentLIstView
+
+    async def get(self, request, pk, *args, **kwargs):
+        async def comments():
+            queryset = Comment.objects.filter(post__id=pk).select_related('author').order_by('created_time')
+            return [comment async for comment in queryset]
+
+        async def liked_comment_ids():
+            if not request.user.is_authenticated:
+                return set()
+            queryset = CommentLike.objects.filter(author=request.user, comment__post__id=pk)
+            return {comment_id async for comment_id in queryset.values_list('comment_id', flat=True)}
+
+        context = {
+            'request': request,
+            'max_depth': get_number_param(request, 'max_depth'),
+            'replies_limit': get_number_param(request, 'replies_limit'),
+        }
+        # commentlar va men like bosganlar bir vaqtda olinadi
+        all_comments, context['liked_comment_ids'] = await asyncio.gather(comments(), liked_comment_ids())
+        tree = defaultdict(list)
+        for comment in all_comments:
+            tree[comment.parent_id].append(comment)
+        context['comment_tree'] = tree
+
+        serializer = CommentSerializer(tree[None], many=True, context=context)
+        return JsonResponse(serializer.data, safe=False)
@@ -0,0 +1,58 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+POST_VERSION_KEY = 'post:{}:v'
+FEED_VERSION_KEY = 'feed:v'
+
+
+def get_version(key):  # versiya kaliti ozgarsa eski keshlar oz-ozidan eskiradi
+    cache.add(key, 1, timeout=None)
+    return cache.get(key, 1)
+
+
+def bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:  # kalit yoq bolsa (masalan redis tozalangan)
+        cache.set(key, 2, timeout=None)
+
+
+def invalidate_post(post_id):  # post, like yoki comment ozgarganda detail va feed keshlarini eskirtiradi
+    def bump():
+        bump_version(POST_VERSION_KEY.format(post_id))
+        bump_version(FEED_VERSION_KEY)
+
+    transaction.on_commit(bump)  # commitdan keyin, aks holda eski malumot qayta keshlanib qolishi mumkin
+
+
+def invalidate_feed():
+    transaction.on_commit(lambda: bump_version(FEED_VERSION_KEY))
+
+
+def post_detail_key(post_id):
+    return f'post:{post_id}:detail:{get_version(POST_VERSION_KEY.format(post_id))}'
+
+
+def feed_page_key(request):  # cursor, page_size va boshqa parametrlar ham kalitga kiradi
+    query = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'feed:{get_version(FEED_VERSION_KEY)}:{query}'
+
+
+def get_post_detail(post_id):
+    return cache.get(post_detail_key(post_id))
+
+
+def set_post_detail(post_id, data):  # me_liked har bir user uchun alohida, keshga kirmaydi
+    data = {key: value for key, value in data.items() if key != 'me_liked'}
+    cache.set(post_detail_key(post_id), data, settings.POST_CACHE_TTL)
+
+
+def get_feed_page(request):
+    return cache.get(feed_page_key(request))
+
+
+def set_feed_page(request, data):
+    cache.set(feed_page_key(request), data, settings.FEED_CACHE_TTL)
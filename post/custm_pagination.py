@@ -1,4 +1,4 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import PageNumberPagination, CursorPagination
 from rest_framework.response import Response
 
 
@@ -16,3 +16,27 @@ class CustomPagination(PageNumberPagination):
                 "results": data
             }
         )
+
+
+class CustomCursorPagination(CursorPagination):  # OFFSET va har pageda COUNT qilmasdan keyingi pagega otadi
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_time', '-id')  # (created_time, id) boyicha kalit, bir xil vaqtlar id bilan ajraladi
+    skip_count_query_param = 'skip_count'  # ?skip_count=true bolsa COUNT umuman ishlamaydi (infinite scroll)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = None
+        if request.query_params.get(self.skip_count_query_param, '').lower() not in ('1', 'true'):
+            self.count = queryset.count()
+        return super(CustomCursorPagination, self).paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        response = {
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data
+        }
+        if self.count is not None:
+            response["count"] = self.count  # umumiy soni
+        return Response(response)
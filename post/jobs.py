@@ -0,0 +1,15 @@
+from shared.jobs import register_job
+from .caching import invalidate_post
+from .models import Post, PROCESSING, FAILED
+
+
+def post_image_failed(post_id):  # dead-letter: klient "processing" postni abadiy kutib qolmasin
+    if Post.objects.filter(pk=post_id, image_status=PROCESSING).update(image_status=FAILED):
+        invalidate_post(post_id)
+
+
+@register_job('process_post_image', on_dead=post_image_failed)
+def process_post_image(post_id):
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None and post.image:  # worker yetib kelguncha post ochirilgan bolishi mumkin
+        post.process_image()
@@ -0,0 +1,72 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+
+from post.models import Post
+
+
+def percentiles(latencies):
+    latencies = sorted(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return statistics.median(latencies) * 1000, p99 * 1000
+
+
+class Command(BaseCommand):
+    # bir xil parallellikda: WSGI handler + sync view, ASGI handler + sync view, ASGI handler + async view
+    # test clientlar request/middleware/view ni process ichida ishlatadi (tarmoq va server hisobga kirmaydi)
+    help = "Compare p50/p99 latency of the read endpoints under WSGI and ASGI"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--token', help="Bearer token, berilmasa anonim so'rovlar")
+
+    def handle(self, *args, **options):
+        post = Post.objects.order_by('-created_time').first()
+        if post is None:
+            raise CommandError("Bazada post yoq")
+        headers = {'HTTP_AUTHORIZATION': f"Bearer {options['token']}"} if options['token'] else {}
+        endpoints = [
+            ('list', '/post/posts/', '/post/async/posts/'),
+            ('detail', f'/post/posts/{post.id}/', f'/post/async/posts/{post.id}/'),
+            ('comments', f'/post/posts/{post.id}/comments/', f'/post/async/posts/{post.id}/comments/'),
+        ]
+        for name, sync_path, async_path in endpoints:
+            for label, latencies in (
+                ('WSGI sync ', self.run_wsgi(sync_path, headers, options)),
+                ('ASGI sync ', asyncio.run(self.run_asgi(sync_path, headers, options))),
+                ('ASGI async', asyncio.run(self.run_asgi(async_path, headers, options))),
+            ):
+                p50, p99 = percentiles(latencies)
+                self.stdout.write(f"{name:9} {label}: p50 {p50:.1f} ms, p99 {p99:.1f} ms")
+
+    @staticmethod
+    def run_wsgi(path, headers, options):
+        client = Client()
+
+        def request(_):
+            start = time.perf_counter()
+            response = client.get(path, **headers)
+            assert response.status_code == 200, response.status_code
+            return time.perf_counter() - start
+
+        with ThreadPoolExecutor(options['concurrency']) as pool:  # gunicorn --threads kabi
+            return list(pool.map(request, range(options['requests'])))
+
+    @staticmethod
+    async def run_asgi(path, headers, options):
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(options['concurrency'])
+
+        async def request():
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(path, **headers)
+                assert response.status_code == 200, response.status_code
+                return time.perf_counter() - start
+
+        return await asyncio.gather(*(request() for _ in range(options['requests'])))
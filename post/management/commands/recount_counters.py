@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from post.models import recount_counters
+
+
+class Command(BaseCommand):  # likes_count va comments_count ni bazadagi haqiqiy sonlar bilan qayta hisoblaydi
+    help = "Recompute stored like/comment counters on posts and comments"
+
+    def handle(self, *args, **options):
+        posts, comments = recount_counters()
+        self.stdout.write(self.style.SUCCESS(f"{posts} ta post va {comments} ta comment qayta hisoblandi"))
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.8 on 2026-10-18 18:03
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('post', '0003_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelinePost',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('created_time', models.DateTimeField(auto_now_add=True)),
+                ('updated_time', models.DateTimeField(auto_now=True)),
+                ('posted_time', models.DateTimeField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='post.post')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'TimelinePost',
+                'verbose_name_plural': 'TimelinePosts',
+                'indexes': [models.Index(fields=['user', '-posted_time'], name='timeline_user_time_idx')],
+                'unique_together': {('user', 'post')},
+            },
+        ),
+    ]
@@ -1,14 +1,68 @@
 from django.core.validators import FileExtensionValidator, MaxLengthValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, Exists, OuterRef, Subquery, Value, IntegerField, F
+from django.db.models.functions import Coalesce, Greatest
 from users.models import User
+from post.caching import invalidate_post
+from shared.images import make_image_variants
 from shared.models import BaseModel
 
 
+def change_counter(model, pk, field, delta):  # F() bilan atomik +/- qiladi, race condition bolmaydi
+    model.objects.filter(pk=pk).update(**{field: Greatest(F(field) + delta, 0)})
+
+
+def recount_counters():  # saqlangan sonlarni haqiqiy COUNT bilan tenglaydi (drift bolsa)
+    def count_of(model, field):
+        return Coalesce(Subquery(
+            model.objects.filter(**{field: OuterRef('pk')}).order_by().values(field)
+            .annotate(total=Count('pk')).values('total'),
+            output_field=IntegerField()
+        ), 0)
+
+    posts = Post.objects.update(likes_count=count_of(PostLike, 'post'), comments_count=count_of(Comment, 'post'))
+    comments = Comment.objects.update(likes_count=count_of(CommentLike, 'comment'))
+    return posts, comments
+
+
+PROCESSING, READY, FAILED = ('processing', 'ready', 'failed')
+
+
+class PostQuerySet(models.QuerySet):
+
+    def for_feed(self, user=None):  # me_liked ni asosiy queryning ozida hisoblaydi, sonlar postda saqlangan
+        queryset = self.select_related('author')
+        if user is not None and user.is_authenticated:
+            queryset = queryset.annotate(viewer_liked=Exists(PostLike.objects.filter(post=OuterRef('pk'), author=user)))
+        else:
+            queryset = queryset.annotate(viewer_liked=Value(False))
+        return queryset
+
+
 class Post(BaseModel):
+    IMAGE_STATUS = (
+        (PROCESSING, PROCESSING),  # variantlar hali worker da
+        (READY, READY),
+        (FAILED, FAILED)
+    )
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='posts')
     caption = models.TextField(validators=[MaxLengthValidator(5000)])
     image = models.ImageField(upload_to='post_images', validators=[
         FileExtensionValidator(allowed_extensions=['jpg', 'jpeg', 'png'])])
+    image_width = models.PositiveIntegerField(null=True, blank=True)
+    image_height = models.PositiveIntegerField(null=True, blank=True)
+    image_variants = models.JSONField(default=dict, blank=True)  # thumbnail/feed/full -> fayl yoli
+    image_status = models.CharField(max_length=31, choices=IMAGE_STATUS, default=READY)
+    likes_count = models.PositiveIntegerField(default=0)  # PostLike lar soni, har safar COUNT qilmaslik un
+    comments_count = models.PositiveIntegerField(default=0)
+
+    objects = PostQuerySet.as_manager()
+
+    def process_image(self):  # rasmdan kichik variantlar yasab saqlaydi (worker chaqiradi)
+        self.image_variants, self.image_width, self.image_height = make_image_variants(self.image, self.image_variants)
+        self.image_status = READY if self.image_variants else FAILED
+        self.save(update_fields=['image', 'image_variants', 'image_width', 'image_height', 'image_status'])
+        invalidate_post(self.id)
 
     def __str__(self):
         return f'{self.author} post about {self.caption}'
@@ -17,6 +71,10 @@ class Post(BaseModel):
         db_table = 'post'
         verbose_name = 'Post'
         verbose_name_plural = 'Posts'
+        indexes = [
+            models.Index(fields=['-created_time', '-id'], name='post_created_idx'),  # feed cursor pagination
+            models.Index(fields=['author', '-created_time'], name='post_author_created_idx'),  # author postlari
+        ]
 
 
 class Comment(BaseModel):
@@ -24,15 +82,27 @@ class Comment(BaseModel):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='comments')
     comment = models.TextField(validators=[MaxLengthValidator(800)])
     parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='children')
+    likes_count = models.PositiveIntegerField(default=0)
 
     # commentga coment yozish un (parent)
 
     def __str__(self):
         return f'{self.author}--{self.comment}'
 
+    def delete(self, *args, **kwargs):  # replaylar ham cascade bilan ochadi, hammasini postdan ayiramiz
+        with transaction.atomic():
+            deleted, per_model = super(Comment, self).delete(*args, **kwargs)
+            change_counter(Post, self.post_id, 'comments_count', -per_model.get(self._meta.label, 0))
+            invalidate_post(self.post_id)
+        return deleted, per_model
+
     class Meta:
         verbose_name = 'Comment'
         verbose_name_plural = 'Comments'
+        indexes = [
+            models.Index(fields=['post', 'created_time'], name='comment_post_created_idx'),  # post commentlari
+            models.Index(fields=['-created_time', '-id'], name='comment_created_idx'),
+        ]
 
 
 # 1) id=1248
@@ -55,6 +125,9 @@ class PostLike(BaseModel):
         verbose_name = 'PostLike'
         verbose_name_plural = 'PostLikes'
         unique_together = ('author', 'post')  # user faqat 1 ta postga 1 ta like berwini anglatadi
+        indexes = [
+            models.Index(fields=['post', '-created_time', '-id'], name='postlike_post_created_idx'),
+        ]
 
 
 class CommentLike(BaseModel):
@@ -68,3 +141,23 @@ class CommentLike(BaseModel):
         verbose_name = 'CommentLike'
         verbose_name_plural = 'CommentLikes'
         unique_together = ('author', 'comment')
+        indexes = [
+            models.Index(fields=['comment', '-created_time', '-id'], name='commentlike_created_idx'),
+        ]
+
+
+class TimelinePost(BaseModel):  # har bir follower uchun oldindan yigilgan home feed (fan-out on write)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='timeline')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='timeline_entries')
+    posted_time = models.DateTimeField()  # post.created_time nusxasi, JOIN siz tartiblash un
+
+    def __str__(self):
+        return f'{self.post} in {self.user} timeline'
+
+    class Meta:
+        verbose_name = 'TimelinePost'
+        verbose_name_plural = 'TimelinePosts'
+        unique_together = ('user', 'post')
+        indexes = [
+            models.Index(fields=['user', '-posted_time'], name='timeline_user_time_idx'),
+        ]
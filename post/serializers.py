@@ -1,14 +1,19 @@
 from rest_framework import serializers
 from post.models import Post, PostLike, Comment, CommentLike
 from users.models import User
+from shared.images import variant_urls
 
 
 class UserSerializer(serializers.ModelSerializer):
     id = serializers.UUIDField(read_only=True)  # id ni uuidi korniwga otkazberadi
+    photo_variants = serializers.SerializerMethodField('get_photo_variants')
 
     class Meta:
         model = User
-        fields = ('id', 'username', 'photo')
+        fields = ('id', 'username', 'photo', 'photo_variants')
+
+    def get_photo_variants(self, obj):
+        return variant_urls(obj.photo_variants, self.context.get('request'))
 
 
 # serializer username, post image, caption, like count, comment cont created time va biz bu postga
@@ -19,6 +24,7 @@ class PostSerializer(serializers.ModelSerializer):
     post_likes_count = serializers.SerializerMethodField('get_post_likes_count')  # 'get_likes_count' funksiya chaqramiz
     post_comments_count = serializers.SerializerMethodField('get_post_comments_count')
     me_liked = serializers.SerializerMethodField('get_me_likes')  # request jonatyotgan postga like bosganmanmi yoqmi
+    image_variants = serializers.SerializerMethodField('get_image_variants')
 
     class Meta:
         model = Post
@@ -26,23 +32,37 @@ class PostSerializer(serializers.ModelSerializer):
             'id',
             'author',
             'image',
+            'image_variants',
+            'image_width',
+            'image_height',
+            'image_status',
             'caption',
             'created_time',
             'post_likes_count',
             'post_comments_count',
             'me_liked'
         )
-        extra_kwargs = {"image": {"required": False}}
+        extra_kwargs = {
+            "image": {"required": False},
+            "image_width": {"read_only": True},
+            "image_height": {"read_only": True},
+            "image_status": {"read_only": True},
+        }
+
+    def get_image_variants(self, obj):  # klient ozi kerakli olchamni tanlaydi
+        return variant_urls(obj.image_variants, self.context.get('request'))
 
     @staticmethod
     def get_post_likes_count(obj):  # obj request kelyotgan post
-        return obj.post_likes.count()  # post_likes Like modeldagi related_name='post_likes'
+        return obj.likes_count  # like bosilganda/ochrilganda postda yangilanib turadi
 
     @staticmethod
     def get_post_comments_count(obj):
-        return obj.comments.count()
+        return obj.comments_count
 
     def get_me_likes(self, obj):
+        if hasattr(obj, 'viewer_liked'):  # Post.objects.for_feed() oldindan hisoblagan bolsa
+            return obj.viewer_liked
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             try:
@@ -65,6 +85,9 @@ class CommentSerializer(serializers.ModelSerializer):
         fields = ['id', 'author', 'created_time', 'post', 'comment', 'parent', 'replies', 'me_liked', 'likes_count']
 
     def get_replies(self, obj):
+        tree = self.context.get('comment_tree')
+        if tree is not None:  # view hamma commentlarni oldindan olib parent boyicha guruhlagan
+            return self.get_tree_replies(obj, tree)
         if obj.children.exists():  # children comment modelda yozlgan, bu commentga replay bormi yoqmi degani
             # serializer = CommentSerializer(obj.children.all(), many=True, context=self.context), ichma ich chaqrish
             serializer = self.__class__(obj.children.all(), many=True, context=self.context)  # bir birga teng
@@ -72,7 +95,21 @@ class CommentSerializer(serializers.ModelSerializer):
         else:
             return None
 
+    def get_tree_replies(self, obj, tree):  # bazaga qayta bormasdan xotiradagi daraxtdan replaylarni oladi
+        depth = self.context.get('depth', 0) + 1
+        max_depth = self.context.get('max_depth')
+        if max_depth is not None and depth > max_depth:
+            return None
+        replies = tree.get(obj.id, [])[:self.context.get('replies_limit')]
+        if not replies:
+            return None
+        serializer = self.__class__(replies, many=True, context={**self.context, 'depth': depth})
+        return serializer.data
+
     def get_me_likes(self, obj):  # camentga like bosganmizmi yoqmi
+        liked_ids = self.context.get('liked_comment_ids')
+        if liked_ids is not None:
+            return obj.id in liked_ids
         user = self.context['request'].user  # request contextni olyamiz bu viewdan keladi
         if user.is_authenticated:
             return obj.comment_likes.filter(author=user).exists()  # wu comment like bosganlar ichda men bor bolsam
@@ -81,7 +118,7 @@ class CommentSerializer(serializers.ModelSerializer):
 
     @staticmethod
     def get_likes(obj):  # comment yiqan likelar soni
-        return obj.comment_likes.count()
+        return obj.likes_count
 
 
 class CommentLikeSerializer(serializers.ModelSerializer):
@@ -102,3 +139,18 @@ class PostLikeSerializer(serializers.ModelSerializer):
         fields = ("id", "author", "post")
 
 
+class PostLikesStateSerializer(PostSerializer):  # faqat sonlar va me_liked, batch endpoint uchun
+    class Meta(PostSerializer.Meta):
+        fields = ('id', 'post_likes_count', 'post_comments_count', 'me_liked')
+
+
+class CommentLikesStateSerializer(CommentSerializer):
+    class Meta(CommentSerializer.Meta):
+        fields = ['id', 'likes_count', 'me_liked']
+
+
+class LikesBatchSerializer(serializers.Serializer):  # bir nechta post va comment id larini qabul qiladi
+    max_ids = 100
+    posts = serializers.ListField(child=serializers.UUIDField(), required=False, default=list, max_length=max_ids)
+    comments = serializers.ListField(child=serializers.UUIDField(), required=False, default=list,
+                                     max_length=max_ids)
@@ -1,3 +1,146 @@
+import uuid
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from shared.jobs import claim_job, load_handlers, run_job
+from shared.models import Job, DEAD
+from shared.testing import IndexUsageMixin
+from users.models import User
+from .models import Post, Comment, PostLike, CommentLike, TimelinePost, PROCESSING, READY, FAILED
+
+
+class PostImageJobTests(TestCase):  # rasm job i tugamasa post "processing" da qolib ketmaydi
+
+    @classmethod
+    def setUpClass(cls):
+        super(PostImageJobTests, cls).setUpClass()
+        load_handlers()
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='anora_k', email='anora@gmail.com')
+
+    def test_post_without_image(self):
+        client = APIClient()
+        client.force_authenticate(self.author)
+        response = client.post('/post/create/', {'caption': 'rasmsiz'}, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Post.objects.get().image_status, READY)
+        self.assertFalse(Job.objects.exists())
+
+    def create_job(self, **kwargs):
+        post = Post.objects.create(author=self.author, caption='x', image='post_images/a.jpg', image_status=PROCESSING)
+        job = Job.objects.create(name='process_post_image', payload={'post_id': str(post.id)}, **kwargs)
+        return post, job
+
+    def test_crashed_worker_dead_letter(self):  # lease tugagan, urinishlar tugagan running job qayta olinmaydi
+        post, job = self.create_job(status='running', attempts=5, run_at=timezone.now() - timedelta(seconds=1))
+        self.assertIsNone(claim_job())
+        job.refresh_from_db()
+        post.refresh_from_db()
+        self.assertEqual((job.status, post.image_status), (DEAD, FAILED))
+
+    def test_failed_job_dead_letter(self):
+        post, job = self.create_job(attempts=4)
+        job = claim_job()
+        with mock.patch.object(Post, 'process_image', side_effect=OSError('buzuq rasm')):
+            self.assertFalse(run_job(job))
+        post.refresh_from_db()
+        self.assertEqual((job.status, post.image_status), (DEAD, FAILED))
+
+
+class PostCacheTests(TestCase):  # PUT, PATCH va DELETE dan keyin detail keshi eskirgan bolishi kerak
+
+    def setUp(self):
+        cache.clear()
+        author = User.objects.create_user(username='anora_k', email='anora@gmail.com')
+        self.post = Post.objects.create(author=author, caption='old', image='post_images/a.jpg')
+        self.url = f'/post/posts/{self.post.id}/'
+        self.client = APIClient()
+        self.client.force_authenticate(author)
+
+    def test_update(self):
+        self.client.get(self.url)  # keshga tushadi
+        for method, caption in (('patch', 'patched'), ('put', 'put')):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = getattr(self.client, method)(self.url, {'caption': caption}, format='json')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(self.client.get(self.url).data['caption'], caption)
+
+    def test_delete(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(self.url)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+
+class AsyncPostListTests(TestCase):  # async list sync PostListView bilan bir xil tartib va javob shaklida
+
+    def setUp(self):
+        cache.clear()
+        author = User.objects.create_user(username='anora_k', email='anora@gmail.com')
+        Post.objects.bulk_create([Post(author=author, caption=str(i), image='post_images/a.jpg') for i in range(25)])
+        now = timezone.now()  # yarmi bir xil vaqtda: kursor id bilan ajratishi kerak
+        for i, post in enumerate(Post.objects.all()):
+            Post.objects.filter(pk=post.pk).update(created_time=now - timedelta(seconds=i // 2))
+
+    def walk(self, url, link):
+        pages = []
+        while url:
+            data = self.client.get(url).json()
+            pages.append([post['id'] for post in data['results']])
+            url = data[link]
+        return pages
+
+    def test_pages_match_sync_view(self):
+        sync_pages = self.walk('/post/posts/?page_size=7', 'next')
+        async_pages = self.walk('/post/async/posts/?page_size=7', 'next')
+        self.assertEqual(async_pages, sync_pages)
+        self.assertEqual(len(sum(async_pages, [])), 25)
+
+        data = self.client.get('/post/async/posts/?page_size=7').json()
+        self.assertEqual(list(data), ['next', 'previous', 'results', 'count'])
+        self.assertEqual((data['previous'], data['count']), (None, 25))
+
+    def test_previous_link(self):
+        url = '/post/async/posts/?page_size=7&skip_count=true'
+        first = self.client.get(url).json()
+        second = self.client.get(first['next']).json()
+        self.assertNotIn('count', second)
+        self.assertEqual(self.client.get(second['previous']).json()['results'], first['results'])
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get('/post/async/posts/?cursor=xyz').status_code, 404)
+
+
+class IndexUsageTests(IndexUsageMixin, TestCase):  # asosiy querylar index orqali ishlaydi
+
+    def test_post_list(self):  # PostListView, CustomCursorPagination tartibi
+        self.assertIndexScan(Post.objects.order_by('-created_time', '-id')[:10], 'post_created_idx')
+
+    def test_author_posts(self):  # backfill_timeline
+        queryset = Post.objects.filter(author_id=uuid.uuid4()).order_by('-created_time')[:50]
+        self.assertIndexScan(queryset, 'post_author_created_idx')
+
+    def test_post_comments(self):  # PostCommentLIstView
+        queryset = Comment.objects.filter(post__id=uuid.uuid4()).order_by('created_time')
+        self.assertIndexScan(queryset, 'comment_post_created_idx')
+
+    def test_comment_list(self):  # CreateCommentListView
+        self.assertIndexScan(Comment.objects.order_by('-created_time', '-id')[:10], 'comment_created_idx')
+
+    def test_post_likes(self):  # PostLikeListView
+        queryset = PostLike.objects.filter(post__id=uuid.uuid4()).order_by('-created_time', '-id')[:10]
+        self.assertIndexScan(queryset, 'postlike_post_created_idx')
+
+    def test_comment_likes(self):  # CommentLikesView
+        queryset = CommentLike.objects.filter(comment__id=uuid.uuid4()).order_by('-created_time', '-id')[:10]
+        self.assertIndexScan(queryset, 'commentlike_created_idx')
 
-# Create your tests here.
+    def test_home_feed(self):  # HomeFeedView -> read_timeline
+        queryset = TimelinePost.objects.filter(user_id=uuid.uuid4()).order_by('-posted_time', '-post_id')[:10]
+        self.assertIndexScan(queryset, 'timeline_user_time_idx')
@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.db.models import Q
+
+from users.models import UserFollow
+from .models import Post, TimelinePost
+
+
+def is_fanout_author(author):  # followeri kop authorlar postlari oqish paytida qoshiladi
+    return author.followers_count < settings.TIMELINE_FANOUT_LIMIT
+
+
+def fan_out_post(post):  # yangi post author va uning followerlari timelinesiga yoziladi
+    author = post.author
+    user_ids = [author.id]  # oz postlari har doim oz timelinesida
+    if is_fanout_author(author):
+        user_ids += UserFollow.objects.filter(following=author).values_list('follower_id', flat=True)
+    TimelinePost.objects.bulk_create(
+        [TimelinePost(user_id=user_id, post=post, posted_time=post.created_time) for user_id in user_ids],
+        batch_size=1000,
+        ignore_conflicts=True
+    )
+
+
+def backfill_timeline(follower, author):  # follow qilinganda authorning oxirgi postlari timelinega qoshiladi
+    if not is_fanout_author(author):
+        return
+    posts = Post.objects.filter(author=author).order_by('-created_time')[:settings.TIMELINE_BACKFILL_SIZE]
+    TimelinePost.objects.bulk_create(
+        [TimelinePost(user=follower, post=post, posted_time=post.created_time) for post in posts],
+        ignore_conflicts=True
+    )
+
+
+def remove_from_timeline(follower, author):  # unfollow
+    TimelinePost.objects.filter(user=follower, post__author=author).delete()
+
+
+def before_filter(time_field, id_field, before):  # (vaqt, id) kursori: bir xil vaqtli postlar tushib qolmaydi
+    posted_time, post_id = before
+    if post_id is None:
+        return Q(**{f'{time_field}__lt': posted_time})
+    return Q(**{f'{time_field}__lt': posted_time}) | Q(**{time_field: posted_time, f'{id_field}__lt': post_id})
+
+
+def read_timeline(user, before=None, limit=10):
+    # timelinedan va katta authorlardan limit tadan olib (vaqt, id) boyicha birlashtiradi, O(limit)
+    # before: (posted_time, post_id) yoki None
+    entries = TimelinePost.objects.filter(user=user)
+    if before is not None:
+        entries = entries.filter(before_filter('posted_time', 'post_id', before))
+    items = list(entries.order_by('-posted_time', '-post_id').values_list('post_id', 'posted_time')[:limit])
+
+    big_authors = UserFollow.objects.filter(
+        follower=user, following__followers_count__gte=settings.TIMELINE_FANOUT_LIMIT
+    ).values('following_id')
+    posts = Post.objects.filter(author__in=big_authors)
+    if before is not None:
+        posts = posts.filter(before_filter('created_time', 'id', before))
+    items += list(posts.order_by('-created_time', '-id').values_list('id', 'created_time')[:limit])
+
+    merged = {}
+    for post_id, posted_time in sorted(items, key=lambda item: (item[1], item[0]), reverse=True):
+        merged.setdefault(post_id, posted_time)  # author katta bolishdan oldin yozilganlari ikki marta kelishi mumkin
+    return list(merged.items())[:limit]
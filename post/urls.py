@@ -1,10 +1,12 @@
 from django.urls import path
+from .async_views import AsyncPostListView, AsyncPostDetailView, AsyncPostCommentListView
 from .views import PostListView, CreatePostView, PostRetrieveUpdateDestroyView, PostCommentLIstView, \
     CreatePostCommentView, CreateCommentListView, PostLikeListView, RetrieveCommentView, CommentLikesView, \
-    PostLikeView, CommentLikeView
+    PostLikeView, CommentLikeView, HomeFeedView, LikesBatchView
 
 urlpatterns = [
     path('posts/', PostListView.as_view()),
+    path('feed/', HomeFeedView.as_view()),
     path('create/', CreatePostView.as_view()),
     path('posts/<uuid:pk>/', PostRetrieveUpdateDestroyView.as_view()),
     path('posts/<uuid:pk>/comments/', PostCommentLIstView.as_view()),
@@ -16,4 +18,10 @@ urlpatterns = [
 
     path('posts/<uuid:pk>/create_delete_like/', PostLikeView.as_view()),
     path('comment/<uuid:pk>/create_delete_like/', CommentLikeView.as_view()),
+    path('likes/batch/', LikesBatchView.as_view()),
+
+    # ASGI da ishlatish uchun async oqish endpointlari
+    path('async/posts/', AsyncPostListView.as_view()),
+    path('async/posts/<uuid:pk>/', AsyncPostDetailView.as_view()),
+    path('async/posts/<uuid:pk>/comments/', AsyncPostCommentListView.as_view()),
 ]
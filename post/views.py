@@ -1,31 +1,104 @@
+import uuid
+from collections import defaultdict
+
 from django.shortcuts import render
+from django.utils.dateparse import parse_datetime
 from rest_framework.generics import ListAPIView
 from rest_framework.permissions import IsAuthenticated, AllowAny, IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.exceptions import ValidationError, NotFound
 from rest_framework.views import APIView
-
-from .custm_pagination import CustomPagination
-from .models import Post, Comment, CommentLike, PostLike
-from .serializers import PostSerializer, CommentSerializer, PostLikeSerializer, CommentLikeSerializer
+from rest_framework.utils.urls import replace_query_param
+from django.db import transaction
+
+from . import caching
+from .custm_pagination import CustomCursorPagination
+from shared.db import insert_ignore_conflict
+from shared.db_router import use_primary
+from shared.jobs import enqueue
+from shared.throttling import UserThrottle, TargetThrottle
+from .models import Post, Comment, CommentLike, PostLike, PROCESSING, READY, change_counter
+from .serializers import PostSerializer, CommentSerializer, PostLikeSerializer, CommentLikeSerializer, \
+    LikesBatchSerializer, PostLikesStateSerializer, CommentLikesStateSerializer
+from .timeline import fan_out_post, read_timeline
 from rest_framework import generics
 
 
 class PostListView(generics.ListAPIView):
     serializer_class = PostSerializer
     permission_classes = [AllowAny]
-    pagination_class = CustomPagination
+    pagination_class = CustomCursorPagination
 
     def get_queryset(self):
-        return Post.objects.all()
+        return Post.objects.for_feed(self.request.user)
+
+    def list(self, request, *args, **kwargs):
+        if request.user.is_authenticated:  # me_liked userga bogliq, faqat anonim pagelar keshlanadi
+            return super(PostListView, self).list(request, *args, **kwargs)
+        data = caching.get_feed_page(request)
+        if data is None:
+            use_primary()  # keshga replikadagi eski page yozilmasin
+            data = super(PostListView, self).list(request, *args, **kwargs).data
+            caching.set_feed_page(request, data)
+        return Response(data)
 
 
 class CreatePostView(generics.CreateAPIView):
     serializer_class = PostSerializer
     permission_classes = [IsAuthenticated]
 
+    @transaction.atomic  # post, job va timeline qatorlari birga saqlanadi yoki birortasi ham yoq
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        has_image = bool(serializer.validated_data.get('image'))
+        post = serializer.save(author=self.request.user, image_status=PROCESSING if has_image else READY)
+        if has_image:
+            enqueue('process_post_image', post_id=str(post.id))  # rasm worker da, request kutib turmaydi
+        fan_out_post(post)
+        caching.invalidate_feed()
+
+
+class HomeFeedView(APIView):  # men follow qilgan authorlar postlari
+    permission_classes = [IsAuthenticated]
+    page_size = 10
+    max_page_size = 100
+
+    def get(self, request, *args, **kwargs):
+        before = request.query_params.get('before')
+        if before is not None:
+            before = (parse_datetime(before), self.get_before_id())
+            if before[0] is None:
+                raise ValidationError({"success": False, "message": "before notogri vaqt formatida"})
+        page_size = request.query_params.get('page_size', str(self.page_size))
+        if not page_size.isdigit():
+            raise ValidationError({"success": False, "message": "page_size musbat son bolishi kerak"})
+        page_size = max(1, min(int(page_size), self.max_page_size))
+
+        items = read_timeline(request.user, before=before, limit=page_size)
+        posts = Post.objects.for_feed(request.user).in_bulk([post_id for post_id, _ in items])
+        serializer = PostSerializer(
+            [posts[post_id] for post_id, _ in items if post_id in posts], many=True, context={'request': request}
+        )
+        next_link = None
+        if len(items) == page_size:
+            post_id, posted_time = items[-1]
+            next_link = replace_query_param(request.build_absolute_uri(), 'before', posted_time.isoformat())
+            next_link = replace_query_param(next_link, 'before_id', str(post_id))
+        return Response(
+            {
+                "next": next_link,
+                "results": serializer.data
+            }
+        )
+
+    def get_before_id(self):  # bir xil vaqtdagi postlarni ajratish un, eski linklarda bolmasligi mumkin
+        before_id = self.request.query_params.get('before_id')
+        if before_id is None:
+            return None
+        try:
+            return uuid.UUID(before_id)
+        except ValueError:
+            raise ValidationError({"success": False, "message": "before_id notogri formatda"})
 
 
 class PostRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
@@ -33,11 +106,34 @@ class PostRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = PostSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
+    def get_queryset(self):
+        return Post.objects.for_feed(self.request.user)
+
+    def retrieve(self, request, *args, **kwargs):  # umumiy qismi keshdan, me_liked alohida hisoblanadi
+        data = caching.get_post_detail(self.kwargs['pk'])
+        if data is None:
+            use_primary()
+            data = self.get_serializer(self.get_object()).data
+            caching.set_post_detail(self.kwargs['pk'], data)
+            return Response(data)
+        data['me_liked'] = request.user.is_authenticated and PostLike.objects.filter(
+            post_id=self.kwargs['pk'], author=request.user
+        ).exists()
+        return Response(data)
+
+    @transaction.atomic  # kesh versiyasi commitdan keyin oshadi
+    def perform_update(self, serializer):  # PUT va PATCH ikkalasi ham shu yerdan otadi
+        new_image = bool(serializer.validated_data.get('image'))
+        post = serializer.save(**({'image_status': PROCESSING} if new_image else {}))
+        if new_image:  # yangi rasm yuklangan bolsa variantlar qaytadan
+            enqueue('process_post_image', post_id=str(post.id))
+        caching.invalidate_post(post.id)
+
     def put(self, request, *args, **kwargs):
         post = self.get_object()  # utldan kelyotgan id ni postga briktradi
         serializer = self.serializer_class(post, data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        self.perform_update(serializer)
         return Response(
             {
                 "success": True,
@@ -49,7 +145,10 @@ class PostRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
 
     def delete(self, request, *args, **kwargs):
         post = self.get_object()
-        post.delete()
+        post_id = post.id  # delete() dan keyin post.id None boladi
+        with transaction.atomic():  # versiya ochirilgandan keyin oshadi, oraliqdagi GET postni qayta keshlamaydi
+            post.delete()
+            caching.invalidate_post(post_id)
         return Response(
             {
                 "success": True,
@@ -69,27 +168,61 @@ class PostCommentLIstView(generics.ListAPIView):  # post commentlarni korish
 
     def get_queryset(self):
         post_id = self.kwargs['pk']
-        queryset = Comment.objects.filter(post__id=post_id)
+        queryset = Comment.objects.filter(post__id=post_id).select_related('author').order_by('created_time')
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        # postning hamma commentlari 1 ta queryda olinadi va parent boyicha xotirada daraxtga yigiladi
+        tree = defaultdict(list)
+        for comment in self.get_queryset():
+            tree[comment.parent_id].append(comment)
+
+        context = self.get_serializer_context()
+        context['comment_tree'] = tree
+        context['max_depth'] = self.get_limit_param('max_depth')
+        context['replies_limit'] = self.get_limit_param('replies_limit')
+        if request.user.is_authenticated:  # men like bosgan commentlar ham 1 ta queryda
+            context['liked_comment_ids'] = set(CommentLike.objects.filter(
+                author=request.user, comment__post__id=self.kwargs['pk']
+            ).values_list('comment_id', flat=True))
+        else:
+            context['liked_comment_ids'] = set()
+
+        serializer = self.serializer_class(tree[None], many=True, context=context)  # faqat birinchi darajali
+        return Response(serializer.data)
+
+    def get_limit_param(self, name):
+        value = self.request.query_params.get(name)
+        if value is None:
+            return None
+        if not value.isdigit():
+            raise ValidationError({"success": False, "message": f"{name} musbat son bolishi kerak"})
+        return int(value)
+
 
 class CreatePostCommentView(generics.CreateAPIView):  # comment yozish
     serializer_class = CommentSerializer
     permission_classes = [IsAuthenticated, ]
 
+    @transaction.atomic
     def perform_create(self, serializer):
         post_id = self.kwargs['pk']
         serializer.save(author=self.request.user, post_id=post_id)
+        change_counter(Post, post_id, 'comments_count', 1)
+        caching.invalidate_post(post_id)
 
 
 class CreateCommentListView(generics.ListCreateAPIView):  # hamma commentlarni korish, postga comment yozish
     serializer_class = CommentSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
-    pagination_class = CustomPagination
-    queryset = Comment.objects.all()
+    pagination_class = CustomCursorPagination
+    queryset = Comment.objects.select_related('author')
 
+    @transaction.atomic
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        comment = serializer.save(author=self.request.user)
+        change_counter(Post, comment.post_id, 'comments_count', 1)
+        caching.invalidate_post(comment.post_id)
 
 
 class RetrieveCommentView(generics.RetrieveAPIView):  # 1 ta kamentni olish
@@ -98,81 +231,151 @@ class RetrieveCommentView(generics.RetrieveAPIView):  # 1 ta kamentni olish
     queryset = Comment.objects.all()
 
 
+class LikesBatchView(APIView):  # profil, deep link kabi joylardagi postlar uchun sonlar va me_liked, bitta sorovda
+    permission_classes = [AllowAny]
+
+    def post(self, request, *args, **kwargs):
+        serializer = LikesBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        post_ids = serializer.validated_data['posts']
+        comment_ids = serializer.validated_data['comments']
+        context = {'request': request}
+
+        posts = Post.objects.for_feed(request.user).filter(id__in=post_ids) if post_ids else []
+        comments = Comment.objects.filter(id__in=comment_ids) if comment_ids else []
+        if comment_ids and request.user.is_authenticated:
+            context['liked_comment_ids'] = set(CommentLike.objects.filter(
+                author=request.user, comment_id__in=comment_ids
+            ).values_list('comment_id', flat=True))
+        else:
+            context['liked_comment_ids'] = set()
+
+        return Response(
+            {
+                "posts": PostLikesStateSerializer(posts, many=True, context=context).data,
+                "comments": CommentLikesStateSerializer(comments, many=True, context=context).data
+            }
+        )
+
+
 class PostLikeListView(generics.ListAPIView):  # Post like larni olish
     serializer_class = PostLikeSerializer
     permission_classes = [AllowAny]
+    pagination_class = CustomCursorPagination
 
     def get_queryset(self):
         post_id = self.kwargs['pk']
-        return PostLike.objects.filter(post__id=post_id)
+        return PostLike.objects.filter(post__id=post_id).select_related('author')
 
 
 class CommentLikesView(generics.ListAPIView):  # comentga like bosganlarni royxatni chiqaradi
     serializer_class = CommentLikeSerializer
     permission_classes = [AllowAny]
+    pagination_class = CustomCursorPagination
 
     def get_queryset(self):
         comment_id = self.kwargs['pk']
-        return CommentLike.objects.filter(comment__id=comment_id)
-
-
-class PostLikeView(APIView):  # postga like bosw va ochrish
-
-    def post(self, request, pk):
-        # post_id = self.kwargs['pk'] --> 2 - usul faqat postda pk yozlmaydi
-        try:
-            post_like = PostLike.objects.get(
-                author=self.request.user,
-                post_id=pk
-            )
-            post_like.delete()
+        return CommentLike.objects.filter(comment__id=comment_id).select_related('author')
+
+
+class BaseLikeView(APIView):  # like qoyish va ochrish, har biri bitta atomik SQL (race condition yoq)
+    like_model = None
+    target_model = None
+    target_field = None  # 'post' yoki 'comment'
+    serializer_class = None
+    liked_message = None
+    unliked_message = None
+
+    def like(self, pk):  # INSERT ... ON CONFLICT DO NOTHING, yangi qoshilgan bolsa like obyektni qaytaradi
+        like = self.like_model(author=self.request.user, **{f'{self.target_field}_id': pk})
+        if not insert_ignore_conflict(like, self.target_field):
+            return None
+        change_counter(self.target_model, pk, 'likes_count', 1)
+        self.likes_changed(pk)
+        return like
+
+    def unlike(self, pk):  # bitta DELETE, ochrilgan bolsa True
+        deleted, _ = self.like_model.objects.filter(
+            author=self.request.user, **{f'{self.target_field}_id': pk}
+        ).delete()
+        if deleted:
+            change_counter(self.target_model, pk, 'likes_count', -1)
+            self.likes_changed(pk)
+        return bool(deleted)
+
+    def likes_changed(self, pk):
+        pass
+
+    def get_likes_count(self, pk):  # klient qayta sorov yubormasligi un yangi sonni qaytaramiz
+        likes_count = self.target_model.objects.filter(pk=pk).values_list('likes_count', flat=True).first()
+        if likes_count is None:
+            raise NotFound(detail=f"{self.target_model._meta.verbose_name} not found")
+        return likes_count
+
+    @transaction.atomic
+    def post(self, request, pk):  # toggle: bor bolsa ochiradi, yoq bolsa qoyadi
+        if self.unlike(pk):
             data = {
                 "success": True,
-                "message": "Postga LIKE muvofaqiyatlik o'chrildi",
-                "data": None
+                "message": self.unliked_message,
+                "data": None,
+                "likes_count": self.get_likes_count(pk)
             }
-            return Response(data, status=status.HTTP_204_NO_CONTENT)
-        except PostLike.DoesNotExist:
-            post_like = PostLike.objects.create(
-                author=self.request.user,
-                post_id=pk
-            )
-            serializer = PostLikeSerializer(post_like)
-            data = {
+            return Response(data, status=status.HTTP_200_OK)  # 204 da body tashlanadi, likes_count yetmaydi
+        like = self.like(pk)
+        data = {
+            "success": True,
+            "message": self.liked_message,
+            "data": self.serializer_class(like).data if like is not None else None,
+            "likes_count": self.get_likes_count(pk)
+        }
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    @transaction.atomic
+    def put(self, request, pk):  # like qoyish, qayta yuborilsa ham natija bir xil (idempotent)
+        self.like(pk)
+        return self.state_response(pk, True, self.liked_message)
+
+    @transaction.atomic
+    def delete(self, request, pk):  # like ochrish, idempotent
+        self.unlike(pk)
+        return self.state_response(pk, False, self.unliked_message)
+
+    def state_response(self, pk, liked, message):
+        return Response(
+            {
                 "success": True,
-                "message": "Postga LIKE muvofaqiyatlik qo'yildi",
-                "data": serializer.data
-            }
-            return Response(data, status=status.HTTP_201_CREATED)
+                "message": message,
+                "data": {
+                    "me_liked": liked,
+                    "likes_count": self.get_likes_count(pk)
+                }
+            }, status=status.HTTP_200_OK
+        )
 
 
-class CommentLikeView(APIView):  # commentga like bosw va ochriw
+class PostLikeView(BaseLikeView):  # postga like bosw va ochrish
+    like_model = PostLike
+    target_model = Post
+    target_field = 'post'
+    serializer_class = PostLikeSerializer
+    liked_message = "Postga LIKE muvofaqiyatlik qo'yildi"
+    unliked_message = "Postga LIKE muvofaqiyatlik o'chrildi"
+    throttle_classes = [UserThrottle, TargetThrottle]  # har like yozuv, counter va kesh invalidatsiyasi
+    throttle_scope = 'like'
+    throttle_target_fields = ('pk',)
 
-    def post(self, request, pk):
-        try:
-            comment_like = CommentLike.objects.get(
-                author=self.request.user,
-                comment_id=pk
-            )
-            comment_like.delete()
-            data = {
-                "success": True,
-                "message": "LIKE muvofaqiyatlik o'chrildi",
-                "data": None
-            }
-            return Response(data, status=status.HTTP_204_NO_CONTENT)
-        except CommentLike.DoesNotExist:
-            comment_like = CommentLike.objects.create(
-                author=self.request.user,
-                comment_id=pk
-            )
-            serializer = CommentLikeSerializer(comment_like)
-            data = {
-                "success": True,
-                "message": "LIKE muvofaqiyatlik qo'yildi",
-                "data": serializer.data
-            }
-            return Response(data, status=status.HTTP_201_CREATED)
+    def likes_changed(self, pk):
+        caching.invalidate_post(pk)
+
+
+class CommentLikeView(BaseLikeView):  # commentga like bosw va ochriw
+    like_model = CommentLike
+    target_model = Comment
+    target_field = 'comment'
+    serializer_class = CommentLikeSerializer
+    liked_message = "LIKE muvofaqiyatlik qo'yildi"
+    unliked_message = "LIKE muvofaqiyatlik o'chrildi"
 
 # class PostLikeView(APIView):  # postga like bosw va ochrish
 #
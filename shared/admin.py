@@ -1,3 +1,18 @@
 from django.contrib import admin
 
-# Register your models here.
+from django.utils import timezone
+
+from .models import Job, PENDING
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'attempts', 'run_at', 'created_time')
+    list_filter = ('status', 'name')
+    actions = ['requeue']
+
+    @admin.action(description="Qaytadan navbatga qo'yish")
+    def requeue(self, request, queryset):  # dead-letter dagi vazifalarni qayta ishga tushirish
+        queryset.update(status=PENDING, attempts=0, run_at=timezone.now())
+
+
+admin.site.register(Job, JobAdmin)
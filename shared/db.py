@@ -0,0 +1,24 @@
+from django.db import connections, router
+
+
+def insert_ignore_conflict(obj, target_field):
+    # INSERT ... SELECT ... WHERE EXISTS(target) ON CONFLICT DO NOTHING RETURNING id
+    # unique juftliklar un (like, follow): bitta statement, takrorisi IntegrityError bermaydi,
+    # target_field korsatgan obyekt (post, comment, user) yoq bolsa yozilmaydi. Yozilgan bolsa True
+    model = type(obj)
+    opts = model._meta
+    target = opts.get_field(target_field).related_model._meta
+    connection = connections[router.db_for_write(model)]
+    qn = connection.ops.quote_name
+    fields = opts.concrete_fields
+    params = [field.get_db_prep_save(field.pre_save(obj, True), connection) for field in fields]
+    params.append(target.pk.get_db_prep_value(getattr(obj, f'{target_field}_id'), connection))
+    sql = (
+        f'INSERT INTO {qn(opts.db_table)} ({", ".join(qn(field.column) for field in fields)}) '
+        f'SELECT {", ".join(["%s"] * len(fields))} '
+        f'WHERE EXISTS (SELECT 1 FROM {qn(target.db_table)} WHERE {qn(target.pk.column)} = %s) '
+        f'ON CONFLICT DO NOTHING RETURNING {qn(opts.pk.column)}'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchone() is not None
@@ -0,0 +1,90 @@
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+PRIMARY = 'default'
+PIN_COOKIE = 'pin_primary'
+
+# request davomida oqish qaysi bazadan: GET da bitta replika tanlanadi (request ichida bir xil malumot korinsin),
+# yozish bolsa yoki yaqinda yozgan klient bolsa primary. Request tashqarisida (worker, buyruqlar) None -> primary
+read_db = ContextVar('read_db', default=None)
+
+
+def use_primary():
+    # shu request qolgan oqishlari primary dan (middleware request oxirida tiklaydi).
+    # yozishdan keyin va kesh toldirishda: versiya oshgandan keyin replika hali eski bolishi mumkin,
+    # eski malumot keshga tushib TTL davomida qolmasin
+    if read_db.get() is not None:
+        read_db.set(PRIMARY)
+
+
+def choose_replica():  # og'irligi boyicha, replika bolmasa primary
+    if not settings.DATABASE_REPLICAS:
+        return PRIMARY
+    aliases, weights = zip(*settings.DATABASE_REPLICAS.items())
+    return random.choices(aliases, weights)[0]
+
+
+class ReplicaRouter:
+    # GET requestlardagi oqishlar ReplicaRoutingMiddleware tanlagan replikaga,
+    # yozish va yozishdan keyingi oqishlar (read-after-write) primary da qoladi
+
+    def db_for_read(self, model, **hints):
+        return read_db.get() or PRIMARY
+
+    def db_for_write(self, model, **hints):
+        use_primary()  # replika hali ulgurmagan
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):  # replikalar primary nusxasi, obyektlar aralashsa boladi
+        databases = {PRIMARY, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    # POST/PUT/DELETE dan keyin klientga qisqa muddatli cookie qoyiladi: keyingi bir necha sekund
+    # ichidagi GET lari ham primary dan oqiydi, yangi post yoki like darhol korinadi.
+    # ASGI da async viewlar (post.async_views) oldida thread hop qilmasligi un async ham ishlaydi
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            read_db.reset(token)
+        return self.finish(request, response)
+
+    async def __acall__(self, request):
+        token = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            read_db.reset(token)
+        return self.finish(request, response)
+
+    @staticmethod
+    def is_safe(request):
+        return request.method in ('GET', 'HEAD', 'OPTIONS')
+
+    def start(self, request):
+        replica = self.is_safe(request) and PIN_COOKIE not in request.COOKIES
+        return read_db.set(choose_replica() if replica else PRIMARY)
+
+    def finish(self, request, response):
+        if not self.is_safe(request) and settings.DATABASE_REPLICAS:
+            response.set_cookie(PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite='Lax')
+        return response
@@ -0,0 +1,98 @@
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# variant nomi -> eng katta tomoni (px), instagram olchamlari
+IMAGE_VARIANTS = (
+    ('thumbnail', 150),
+    ('feed', 640),
+    ('full', 1080),
+)
+WEBP_QUALITY = 80
+JPEG_QUALITY = 85
+
+
+def encode_image(image, image_format, **options):  # EXIF berilmagani un yangi faylda EXIF bolmaydi
+    buffer = BytesIO()
+    image.save(buffer, format=image_format, **options)
+    return ContentFile(buffer.getvalue())
+
+
+def has_alpha(image):
+    return image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+
+
+def without_alpha(image):  # JPEG shaffoflikni qollamaydi, oq fonga qoyamiz
+    background = Image.new('RGB', image.size, (255, 255, 255))
+    background.paste(image, mask=image.getchannel('A'))
+    return background
+
+
+def sanitize_original(field_file, image, image_format, icc_profile):
+    # original ham EXIFsiz (GPS va h.k.) qayta yoziladi, nomi iloji boricha ozgarmaydi
+    options = {'icc_profile': icc_profile} if icc_profile else {}
+    if image_format not in Image.SAVE:  # MPO kabi faqat oqiladigan formatlar
+        image_format = 'JPEG'
+    if image_format == 'JPEG':
+        options.update(quality=95, optimize=True)
+        image = without_alpha(image) if has_alpha(image) else image.convert('RGB')
+    name = field_file.name
+    content = encode_image(image, image_format, **options)
+    field_file.storage.delete(name)
+    field_file.name = field_file.storage.save(name, content)
+
+
+def delete_variants(variants):  # qayta ishlanganda eski variant fayllar storageda qolib ketmasin
+    for path in (variants or {}).values():
+        default_storage.delete(path)
+
+
+def make_image_variants(field_file, old_variants=None):
+    # original rasmdan kichraytirilgan WebP variantlar va progressive JPEG yasaydi, originaldan EXIF olib tashlanadi
+    # (variantlar, width, height) qaytaradi, rasmni ochib bolmasa ({}, None, None)
+    # field_file.name ozgarishi mumkin, chaqiruvchi uni ham saqlashi kerak
+    try:
+        field_file.open('rb')
+        with Image.open(field_file) as original:
+            image_format = original.format
+            icc_profile = original.info.get('icc_profile')
+            image = ImageOps.exif_transpose(original)  # telefon aylantirgan rasmlarni togrilaydi
+            image.load()
+    except (UnidentifiedImageError, OSError):  # heic kabi Pillow ochaolmaydigan formatlar
+        return {}, None, None
+    finally:
+        field_file.close()
+
+    image = image.convert('RGBA' if has_alpha(image) else 'RGB')  # WebP shaffoflikni saqlaydi
+    sanitize_original(field_file, image, image_format, icc_profile)
+    delete_variants(old_variants)
+
+    width, height = image.size
+    directory, filename = os.path.split(field_file.name)
+    stem = os.path.splitext(filename)[0]
+    variants = {}
+    for name, size in IMAGE_VARIANTS:
+        resized = image.copy()
+        resized.thumbnail((size, size), Image.LANCZOS)  # kichik rasmlar kattalashtirilmaydi
+        variants[name] = default_storage.save(
+            f'{directory}/variants/{stem}_{name}.webp',
+            encode_image(resized, 'WEBP', quality=WEBP_QUALITY, method=4)
+        )
+        if name == 'full':  # WebP ni qollamaydigan klientlar uchun
+            variants['full_jpeg'] = default_storage.save(
+                f'{directory}/variants/{stem}_{name}.jpg',
+                encode_image(without_alpha(resized) if has_alpha(resized) else resized, 'JPEG',
+                             quality=JPEG_QUALITY, progressive=True, optimize=True)
+            )
+    return variants, width, height
+
+
+def variant_urls(variants, request=None):  # saqlangan yollarni URL ga aylantiradi
+    urls = {}
+    for name, path in (variants or {}).items():
+        url = default_storage.url(path)
+        urls[name] = request.build_absolute_uri(url) if request is not None else url
+    return urls
@@ -0,0 +1,106 @@
+import logging
+import traceback
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .models import Job, PENDING, RUNNING, DONE, DEAD
+
+logger = logging.getLogger(__name__)
+
+JOB_LEASE = timedelta(minutes=5)  # worker shu vaqtda tugatmasa (process olgan bolsa) boshqa worker oladi
+RETRY_BACKOFF = timedelta(seconds=10)  # 10s, 20s, 40s ...
+
+handlers = {}
+dead_handlers = {}  # job dead-letter ga tushganda chaqiriladi (masalan postni FAILED qilish)
+
+
+def register_job(name, on_dead=None):  # @register_job('process_post_image') bilan handler royxatga olinadi
+    def decorator(func):
+        handlers[name] = func
+        if on_dead is not None:
+            dead_handlers[name] = on_dead
+        return func
+
+    return decorator
+
+
+def load_handlers():  # har bir appdagi jobs.py modullarini import qiladi
+    autodiscover_modules('jobs')
+
+
+def enqueue(name, **payload):  # joriy transaction bilan birga saqlanadi, commitdan keyin worker koradi
+    return Job.objects.create(name=name, payload=payload)
+
+
+def mark_dead(job, error):
+    job.status = DEAD
+    job.last_error = error
+    job.save(update_fields=['status', 'last_error', 'updated_time'])
+    logger.error("Job %s dead-letter ga tushdi: %s", job.id, job.name)
+
+
+def notify_dead(job):  # transactiondan tashqarida, hook xatosi navbatni toxtatmaydi
+    on_dead = dead_handlers.get(job.name)
+    if on_dead is None:
+        return
+    try:
+        on_dead(**job.payload)
+    except Exception:
+        logger.exception("Job %s on_dead xatosi: %s", job.id, job.name)
+
+
+def claim_job():
+    while True:
+        with transaction.atomic():
+            now = timezone.now()
+            job = Job.objects.select_for_update(skip_locked=True).filter(
+                Q(status=PENDING) | Q(status=RUNNING), run_at__lte=now  # running + lease tugagan = worker ochib qolgan
+            ).order_by('run_at').first()
+            if job is None:
+                return None
+            # worker har safar ochgan bolsa (OOM, segfault) exception bolmaydi, urinishlar shu yerda tugaydi,
+            # aks holda buzuq rasm har JOB_LEASE da yana bitta workerni oldiradi
+            crashed = job.status == RUNNING and job.attempts >= job.max_attempts
+            if crashed:
+                mark_dead(job, f"Worker {job.attempts} marta job tugamasdan ochib qoldi (lease tugadi)")
+            else:
+                job.status = RUNNING
+                job.attempts += 1
+                job.run_at = now + JOB_LEASE
+                job.save(update_fields=['status', 'attempts', 'run_at', 'updated_time'])
+        if not crashed:
+            return job
+        notify_dead(job)
+
+
+def run_job(job):
+    try:
+        handlers[job.name](**job.payload)
+    except Exception:
+        if job.attempts >= job.max_attempts:
+            mark_dead(job, traceback.format_exc())
+            notify_dead(job)
+            return False
+        job.last_error = traceback.format_exc()
+        job.status = PENDING
+        job.run_at = timezone.now() + RETRY_BACKOFF * 2 ** (job.attempts - 1)
+        job.save(update_fields=['status', 'run_at', 'last_error', 'updated_time'])
+        return False
+    job.status = DONE
+    job.save(update_fields=['status', 'updated_time'])
+    return True
+
+
+def run_pending_jobs(limit=None):  # navbat bosh bolguncha (yoki limit tagacha) ishlaydi
+    processed = 0
+    while limit is None or processed < limit:
+        job = claim_job()
+        if job is None:
+            break
+        run_job(job)
+        processed += 1
+    return processed
@@ -0,0 +1,64 @@
+import statistics
+import time
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import RequestFactory
+
+from post.models import Post
+
+
+class Command(BaseCommand):
+    # requestlar haqiqiy WSGI handler orqali ketadi (request_started/finished signallari bilan),
+    # shuning un CONN_MAX_AGE=0 da har request ulanish ochib-yopadi, persistent rejimda esa yoq
+    help = "Compare request latency and connections opened with and without persistent DB connections"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', help="Berilmasa oxirgi postning commentlari (keshlanmaydi, har safar bazaga boradi)")
+        parser.add_argument('--host', default='localhost')
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if options['path'] is None:
+            post_id = Post.objects.using(options['database']).order_by('-created_time').values_list('id', flat=True).first()
+            if post_id is None:
+                raise CommandError("Bazada post yoq, --path bering")
+            options['path'] = f'/post/posts/{post_id}/comments/'
+        configured = connection.settings_dict['CONN_MAX_AGE']
+        try:
+            for label, max_age in (('CONN_MAX_AGE=0', 0), ('persistent', configured or 60)):
+                self.run(label, connection, max_age, options)
+        finally:
+            connection.settings_dict['CONN_MAX_AGE'] = configured
+            connection.close()
+
+    def run(self, label, connection, max_age, options):
+        connection.close()
+        connection.settings_dict['CONN_MAX_AGE'] = max_age
+        handler = WSGIHandler()
+        environ = RequestFactory().get(options['path'], HTTP_HOST=options['host']).environ
+        opened = []
+
+        def count(sender, connection, **kwargs):
+            opened.append(connection.alias)
+
+        connection_created.connect(count)
+        latencies = []
+        try:
+            for _ in range(options['requests']):
+                start = time.perf_counter()
+                response = handler(dict(environ), lambda status, headers: None)
+                response.close()  # request_finished -> close_old_connections
+                latencies.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    raise CommandError(f"{options['path']}: {response.status_code}")
+        finally:
+            connection_created.disconnect(count)
+        latencies.sort()
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        self.stdout.write(f"{label:15}: p50 {statistics.median(latencies) * 1000:.2f} ms, p99 {p99 * 1000:.2f} ms, "
+                          f"{len(opened)} ta yangi ulanish / {options['requests']} request")
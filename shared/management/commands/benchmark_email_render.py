@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+
+from shared.utility import ACTIVATION_TEMPLATE, render_activation_email
+
+
+class Command(BaseCommand):  # signup burst da bitta xatni render qilish narxini olchaydi
+    help = "Compare per-message render cost of the activation email"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        count = options['count']
+        codes = [f'{i % 10000:04d}' for i in range(count)]
+
+        start = time.perf_counter()
+        for code in codes:
+            render_to_string(ACTIVATION_TEMPLATE, {'code': code})
+        plain = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for code in codes:
+            render_activation_email(code)
+        cached = time.perf_counter() - start
+
+        self.stdout.write(f"render_to_string: {plain / count * 1e6:.1f} us/xat")
+        self.stdout.write(f"oldindan render:  {cached / count * 1e6:.1f} us/xat ({plain / cached:.0f}x tezroq)")
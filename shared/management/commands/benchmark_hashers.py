@@ -0,0 +1,28 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hashers
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):  # har bir hasher bilan sekundiga nechta login (check_password) qilish mumkin
+    help = "Compare password check throughput across the configured hashers"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=20)
+
+    def handle(self, *args, **options):
+        count = options['count']
+        for hasher in get_hashers():
+            try:
+                encoded = hasher.encode('Sup3r-secret!', hasher.salt())
+            except ValueError as error:  # kutubxona ornatilmagan (masalan argon2-cffi)
+                self.stdout.write(f"{hasher.algorithm}: {error}")
+                continue
+            start = time.perf_counter()
+            for _ in range(count):
+                hasher.verify('Sup3r-secret!', encoded)
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f"{hasher.algorithm}: {elapsed / count * 1000:.1f} ms/login, "
+                              f"{count / elapsed:.1f} login/s (bitta CPU)")
+        self.stdout.write(f"Yangi hashlar uchun: {settings.PASSWORD_HASHERS[0]}")
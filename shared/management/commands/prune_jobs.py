@@ -0,0 +1,29 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from shared.models import Job, DONE
+
+
+class Command(BaseCommand):  # bajarilgan (DONE) vazifalarni bolib-bolib ochiradi, DEAD lar tekshirish un qoladi
+    help = "Delete finished background jobs in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7, help="Shundan eski DONE vazifalar ochiriladi")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--sleep', type=float, default=0.1, help="Har bir batch orasida kutish (sekund)")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        total = 0
+        while True:
+            ids = list(Job.objects.filter(status=DONE, updated_time__lt=cutoff)
+                       .values_list('id', flat=True)[:options['batch_size']])  # job_status_run_at_idx (status)
+            if not ids:
+                break
+            Job.objects.filter(id__in=ids).delete()
+            total += len(ids)
+            time.sleep(options['sleep'])
+        self.stdout.write(self.style.SUCCESS(f"{total} ta bajarilgan vazifa ochirildi"))
@@ -0,0 +1,65 @@
+import logging
+import multiprocessing
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from shared.jobs import load_handlers, run_pending_jobs
+
+logger = logging.getLogger(__name__)
+
+
+def work(sleep):
+    while True:
+        try:
+            processed = run_pending_jobs()
+        except Exception:  # masalan baza ulanishi uzildi: process olmasin, ulanishni yangilab qayta urinadi
+            logger.exception("Worker xatosi, %s sekunddan keyin qayta uriniladi", sleep)
+            close_old_connections()
+            processed = 0
+        if not processed:
+            time.sleep(sleep)  # navbat bosh (yoki xato), biroz kutamiz
+
+
+def stop(signum, frame):  # systemd/docker SIGTERM yuboradi, workerlar ham toxtatilsin
+    raise KeyboardInterrupt
+
+
+def start_worker(sleep):
+    worker = multiprocessing.Process(target=work, args=(sleep,), daemon=True)
+    worker.start()
+    return worker
+
+
+class Command(BaseCommand):  # background vazifalarni bajaruvchi worker processlar
+    help = "Run background job workers"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=2)
+        parser.add_argument('--sleep', type=float, default=1.0)
+        parser.add_argument('--once', action='store_true', help="Navbatdagi vazifalarni bajarib chiqib ketadi")
+
+    def handle(self, *args, **options):
+        load_handlers()
+        if options['once']:
+            processed = run_pending_jobs()
+            self.stdout.write(self.style.SUCCESS(f"{processed} ta vazifa bajarildi"))
+            return
+
+        signal.signal(signal.SIGTERM, stop)
+        connections.close_all()  # fork dan keyin har bir process oz ulanishini ochadi
+        workers = [start_worker(options['sleep']) for _ in range(options['processes'])]
+        self.stdout.write(self.style.SUCCESS(f"{len(workers)} ta worker ishga tushdi"))
+        try:
+            while True:  # olib qolgan (masalan OOM bilan) workerlar qayta ishga tushiriladi
+                for number, worker in enumerate(workers):
+                    if not worker.is_alive():
+                        logger.error("Worker %s (pid %s) toxtadi, exitcode %s, qayta ishga tushirilmoqda",
+                                     number, worker.pid, worker.exitcode)
+                        workers[number] = start_worker(options['sleep'])
+                time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.terminate()
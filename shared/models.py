@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 import uuid
 
 
@@ -12,3 +13,30 @@ class BaseModel(models.Model):
     class Meta:
         abstract = True
         # (inhernt)meros olish uchunligni bildiradi db ga saqlanmaydi
+
+
+PENDING, RUNNING, DONE, DEAD = ('pending', 'running', 'done', 'dead')
+
+
+class Job(BaseModel):  # background worker bajaradigan vazifa (DB navbat)
+    STATUS_CHOICES = (
+        (PENDING, PENDING),
+        (RUNNING, RUNNING),
+        (DONE, DONE),
+        (DEAD, DEAD)  # max_attempts dan oshgan, dead-letter
+    )
+    name = models.CharField(max_length=127)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=31, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)  # running bolsa lease tugash vaqti
+    last_error = models.TextField(blank=True)
+
+    def __str__(self):
+        return f'{self.name} ({self.status})'
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_at'], name='job_status_run_at_idx'),
+        ]
@@ -0,0 +1,78 @@
+import sys
+import threading
+from functools import lru_cache
+
+from decouple import config
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class SMSMessage:
+
+    def __init__(self, to, body, from_=None):
+        self.to = to
+        self.body = body
+        self.from_ = from_ or settings.SMS_FROM_NUMBER
+
+    def __str__(self):
+        return f'{self.from_} -> {self.to}: {self.body}'
+
+
+class BaseSMSBackend:  # django email backendlari kabi: open, close, send_messages
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def send_messages(self, messages):
+        raise NotImplementedError
+
+
+@lru_cache(maxsize=None)
+def twilio_client():  # process boyi bitta client, ichidagi HTTP session ulanishlarni qayta ishlatadi
+    from twilio.rest import Client
+    return Client(config('account_sid'), config('auth_token'))
+
+
+class TwilioSMSBackend(BaseSMSBackend):
+
+    def send_messages(self, messages):
+        client = twilio_client()
+        for message in messages:
+            client.messages.create(body=message.body, from_=message.from_, to=message.to)
+        return len(messages)
+
+
+class ConsoleSMSBackend(BaseSMSBackend):  # lokal ishlash uchun, terminalga chiqaradi
+
+    def send_messages(self, messages):
+        for message in messages:
+            sys.stdout.write(f'SMS {message}\n')
+        sys.stdout.flush()
+        return len(messages)
+
+
+class FileSMSBackend(BaseSMSBackend):  # offline muhit uchun, SMS_FILE_PATH fayliga yozadi
+    lock = threading.Lock()
+
+    def send_messages(self, messages):
+        with self.lock, open(settings.SMS_FILE_PATH, 'a') as file:
+            for message in messages:
+                file.write(f'{message}\n')
+        return len(messages)
+
+
+outbox = []
+
+
+class LocMemSMSBackend(BaseSMSBackend):  # testlar uchun, shared.sms.outbox ga yigadi
+
+    def send_messages(self, messages):
+        outbox.extend(messages)
+        return len(messages)
+
+
+def get_sms_connection():
+    return import_string(settings.SMS_BACKEND)()
@@ -0,0 +1,13 @@
+from unittest import skipUnless
+
+from django.db import connection
+
+
+@skipUnless(connection.vendor == 'postgresql', "EXPLAIN tekshiruvi faqat PostgreSQL da")
+class IndexUsageMixin:  # endpointlarning asosiy querylari index orqali ishlashini tekshirish un, TestCase bilan
+
+    def assertIndexScan(self, queryset, index_name):
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')  # kichik test jadvalida ham planner indexni tanlashi un
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, plan)
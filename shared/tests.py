@@ -1,3 +1,100 @@
-from django.test import TestCase
+import warnings
+from collections import Counter
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.db import router
+from django.http import HttpResponse
+from django.test import SimpleTestCase, RequestFactory, override_settings
+
+from post.models import Post
+from .db_router import PIN_COOKIE, PRIMARY, ReplicaRoutingMiddleware, choose_replica
+
+REPLICAS = {'replica_1': 3, 'replica_2': 1}
+
+
+@override_settings(
+    DATABASES={**settings.DATABASES, **{alias: settings.DATABASES['default'] for alias in REPLICAS}},
+    DATABASE_REPLICAS=REPLICAS,
+)
+class ReplicaRouterTests(SimpleTestCase):  # router faqat alias tanlaydi, replikalarga ulanish shart emas
+
+    @classmethod
+    def setUpClass(cls):
+        with warnings.catch_warnings():  # aliaslar faqat nom un, connectionlar qayta ochilmaydi
+            warnings.filterwarnings('ignore', 'Overriding setting DATABASES')
+            super(ReplicaRouterTests, cls).setUpClass()
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def run_request(self, request, view):  # view ichida router qaytargan aliaslar
+        aliases = []
+
+        def get_response(request):
+            view(aliases)
+            return HttpResponse()
+
+        response = ReplicaRoutingMiddleware(get_response)(request)
+        return aliases, response
+
+    def test_weighted_choice(self):
+        with mock.patch('shared.db_router.random.choices', return_value=['replica_2']) as choices:
+            self.assertEqual(choose_replica(), 'replica_2')
+        choices.assert_called_once_with(('replica_1', 'replica_2'), (3, 1))
+
+        counts = Counter(choose_replica() for _ in range(4000))
+        self.assertEqual(set(counts), set(REPLICAS))
+        self.assertAlmostEqual(counts['replica_1'] / 4000, 0.75, delta=0.05)
+
+    @override_settings(DATABASE_REPLICAS={})
+    def test_no_replicas(self):
+        self.assertEqual(choose_replica(), PRIMARY)
+
+    def test_get_reads_one_replica(self):  # request ichidagi hamma oqishlar bitta replikadan
+        def view(aliases):
+            aliases.extend(router.db_for_read(Post) for _ in range(20))
+
+        aliases, response = self.run_request(self.factory.get('/'), view)
+        self.assertEqual(len(set(aliases)), 1)
+        self.assertIn(aliases[0], REPLICAS)
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+        self.assertEqual(router.db_for_read(Post), PRIMARY)  # request tashqarisida
+
+    def test_write_pins_request(self):
+        def view(aliases):
+            aliases.append(router.db_for_read(Post))
+            aliases.append(router.db_for_write(Post))
+            aliases.append(router.db_for_read(Post))
+
+        aliases, _ = self.run_request(self.factory.get('/'), view)
+        self.assertIn(aliases[0], REPLICAS)
+        self.assertEqual(aliases[1:], [PRIMARY, PRIMARY])
+
+    def test_pin_cookie(self):
+        def view(aliases):
+            aliases.append(router.db_for_read(Post))
+
+        aliases, response = self.run_request(self.factory.post('/'), view)
+        self.assertEqual(aliases, [PRIMARY])
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], settings.REPLICA_PIN_SECONDS)
+
+        request = self.factory.get('/')
+        request.COOKIES[PIN_COOKIE] = '1'  # yaqinda yozgan klient
+        aliases, _ = self.run_request(request, view)
+        self.assertEqual(aliases, [PRIMARY])
+
+    def test_async_request(self):
+        aliases = []
+
+        async def get_response(request):
+            aliases.append(router.db_for_read(Post))
+            return HttpResponse()
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        async_to_sync(middleware)(self.factory.get('/'))
+        response = async_to_sync(middleware)(self.factory.delete('/'))
+        self.assertIn(aliases[0], REPLICAS)
+        self.assertEqual(aliases[1], PRIMARY)
+        self.assertIn(PIN_COOKIE, response.cookies)
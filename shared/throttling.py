@@ -0,0 +1,83 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import BaseThrottle
+
+DURATIONS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):  # '5/min' -> (5, 60)
+    num, period = rate.split('/')
+    return int(num), DURATIONS[period[0]]
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    # sliding window taxmini: joriy va oldingi oyna hisoblagichlari (cache.incr), har tekshiruv O(1)
+    # REDIS_URL bolsa redisda (barcha processlar uchun umumiy), bolmasa locmem (test, lokal)
+    # tezlik THROTTLE_RATES['<view.throttle_scope>.<kind>'] dan olinadi, yozilmagan bolsa cheklanmaydi
+    kind = None
+
+    def get_ident_key(self, request, view):  # None bolsa shu throttle ishlamaydi
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        rate = settings.THROTTLE_RATES.get(f'{scope}.{self.kind}')
+        ident = self.get_ident_key(request, view) if rate else None
+        if ident is None:
+            return True
+        num_requests, duration = parse_rate(rate)
+        now = time.time()
+        window, elapsed = divmod(now, duration)
+        key = f'throttle:{scope}:{self.kind}:{ident}'
+        current_key, previous_key = f'{key}:{int(window)}', f'{key}:{int(window) - 1}'
+
+        cache.add(current_key, 0, timeout=duration * 2)  # oldingi oyna sifatida ham kerak boladi
+        try:
+            current = cache.incr(current_key)
+        except ValueError:  # shu orada ochib ketgan
+            cache.set(current_key, 1, timeout=duration * 2)
+            current = 1
+        previous = cache.get(previous_key, 0)
+        # oldingi oynaning hali "korinib turgan" qismi, so'rovlar oynada tekis taqsimlangan deb olinadi
+        estimated = previous * (1 - elapsed / duration) + current
+        if estimated <= num_requests:
+            return True
+        self.wait_time = duration - elapsed
+        return False
+
+    def wait(self):
+        return getattr(self, 'wait_time', None)
+
+
+class IPThrottle(SlidingWindowThrottle):
+    kind = 'ip'
+
+    def get_ident_key(self, request, view):
+        return self.get_ident(request)  # NUM_PROXIES ga qarab X-Forwarded-For yoki REMOTE_ADDR
+
+
+class UserThrottle(SlidingWindowThrottle):
+    kind = 'user'
+
+    def get_ident_key(self, request, view):
+        return request.user.pk if request.user.is_authenticated else None
+
+
+class TargetThrottle(SlidingWindowThrottle):
+    # bitta email/telefon/username yoki bitta obyektga (post) qaratilgan so'rovlar
+    # view.throttle_target_fields: request.data maydonlari, yoki url kwarglari (pk)
+    kind = 'target'
+
+    def get_ident_key(self, request, view):
+        fields = getattr(view, 'throttle_target_fields', ())
+        data = request.data if hasattr(request.data, 'get') else {}
+        values = [view.kwargs.get(field) or data.get(field) for field in fields]
+        values = [str(value).strip().lower() for value in values if value]
+        if not values:
+            return None
+        if request.user.is_authenticated:  # like kabi joylarda: bitta user -> bitta post
+            values.insert(0, str(request.user.pk))
+        return hashlib.md5(':'.join(values).encode()).hexdigest()  # kalitda shaxsiy malumot saqlanmaydi
@@ -1,17 +1,24 @@
+import atexit
+import logging
+import queue
 import re
 import threading
+import time
+from functools import lru_cache
 # import phonenumbers
-from decouple import config
-from twilio.rest import Client
-# import phonenumbers
-from django.core.mail import EmailMessage
+from django.core.mail import EmailMessage, get_connection
 from django.template.loader import render_to_string
+from django.utils.html import escape
 from rest_framework.exceptions import ValidationError
 
+from .sms import SMSMessage, get_sms_connection
+
 email_regex = re.compile(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,7}\b")
 phone_regex = re.compile(r'(\+[0-9]+\s*)?(\([0-9]+\))?[\s0-9\-]+[0-9]+')
 username_regex = re.compile(r"^[a-zA-Z0-9_.-]+$")
 
+logger = logging.getLogger(__name__)
+
 
 def check_email_or_phone(email_phone_number):
     # phone_numbers = phonenumbers.parse(email_phone_number)
@@ -47,17 +54,91 @@ def check_user_type(user_input):
     return user_input
 
 
-class EmailThread(threading.Thread):  # asinxron tarzda bowqa tasklarga xalal bermagan xolda email jonatadi
-
-    def __init__(self, email):
-        self.email = email
-        threading.Thread.__init__(self)
+class MessageQueue:  # cheklangan navbat + bir nechta fon thread, har biri bitta ulanishda kop xabar jonatadi
+
+    def __init__(self, get_connection, maxsize=1000, workers=2, batch_size=50, max_retries=3, backoff=1.0,
+                 put_timeout=5):
+        self.get_connection = get_connection  # email yoki sms backend: open, close, send_messages
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.put_timeout = put_timeout
+        self.threads = []
+        self.lock = threading.Lock()
+
+    def start(self):  # threadlar birinchi xatda ishga tushadi
+        with self.lock:
+            if self.threads:
+                return
+            for _ in range(self.workers):
+                thread = threading.Thread(target=self.run, daemon=True)
+                thread.start()
+                self.threads.append(thread)
+
+    def put(self, message):
+        self.start()
+        try:
+            self.queue.put(message, timeout=self.put_timeout)  # navbat tolsa so'rov kutadi (backpressure)
+        except queue.Full:
+            logger.warning("Navbat tolgan, xabar shu threadda jonatiladi")
+            connection = self.send_batch(None, [message])
+            if connection is not None:
+                connection.close()
+
+    def next_batch(self):
+        batch = [self.queue.get()]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
 
     def run(self):
-        self.email.send()
-
-
-class Email:  # hamma malumotlarni olib EmailThread ni ishga tushuradi
+        connection = None
+        while True:
+            batch = self.next_batch()
+            try:
+                connection = self.send_batch(connection, batch)  # ulanish ham shu yerda, xatosi retry bilan ushlanadi
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+            if self.queue.empty() and connection is not None:  # navbat bosh, ulanishni yopamiz
+                connection.close()
+                connection = None
+
+    def send_batch(self, connection, batch):  # xato bolsa backoff bilan qayta urinadi
+        for attempt in range(self.max_retries + 1):
+            try:
+                if connection is None:
+                    connection = self.get_connection()
+                connection.open()  # ochiq bolsa qayta ochmaydi
+                connection.send_messages(batch)
+                return connection
+            except Exception:
+                logger.exception("Xabar jonatilmadi (urinish %s)", attempt + 1)
+                if connection is not None:
+                    connection.close()
+                connection = None
+                time.sleep(self.backoff * 2 ** attempt)
+        logger.error("%s ta xabar jonatilmadi", len(batch))
+        return connection
+
+    def drain(self, timeout=30):  # process tugashidan oldin navbatdagi xabarlarni jonatib ulguradi
+        deadline = time.monotonic() + timeout
+        while self.queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+
+email_queue = MessageQueue(get_connection)
+sms_queue = MessageQueue(get_sms_connection)
+atexit.register(email_queue.drain)
+atexit.register(sms_queue.drain)
+
+
+class Email:  # hamma malumotlarni olib email_queue ga qoyadi
 
     @staticmethod
     def send_email(data):
@@ -68,14 +149,24 @@ class Email:  # hamma malumotlarni olib EmailThread ni ishga tushuradi
         )
         if data.get('content_type') == 'html':
             email.content_subtype = 'html'
-        EmailThread(email).start()
+        email_queue.put(email)
+
+
+ACTIVATION_TEMPLATE = 'email/authentication/activate_account.html'
+CODE_PLACEHOLDER = '__VERIFY_CODE__'
+
+
+@lru_cache(maxsize=None)
+def activation_template_parts():  # shablon process boshiga 1 marta render qilinadi, code joyidan bolinadi
+    return tuple(render_to_string(ACTIVATION_TEMPLATE, {'code': CODE_PLACEHOLDER}).split(CODE_PLACEHOLDER))
+
+
+def render_activation_email(code):  # har safar render_to_string emas, faqat code qoyiladi
+    return escape(code).join(activation_template_parts())
 
 
 def send_email(email, code):  # code va emailni olib Email clasga jonatadi
-    html_content = render_to_string(
-        'email/authentication/activate_account.html',
-        {'code': code}
-    )
+    html_content = render_activation_email(code)
     Email.send_email(
         {
             "subject": "Ro'yxatdan o'tish",
@@ -86,12 +177,10 @@ def send_email(email, code):  # code va emailni olib Email clasga jonatadi
     )
 
 
-def send_phone_code(phone_number, code):  # sms orqali code jonatiw un funksiya
-    account_sid = config('account_sid')
-    auth_token = config('auth_token')
-    client = Client(account_sid, auth_token)
-    client.messages.create(
-        body=f"Salom! sizning tasdiqlash kodingiz : {code}\n",
-        from_="+9981234567",
-        to=f'{phone_number}'
-    )
+def send_phone_code(phone_number, code):  # sms orqali code jonatiw un funksiya, request gatewayni kutmaydi
+    sms_queue.put(SMSMessage(to=f'{phone_number}', body=f"Salom! sizning tasdiqlash kodingiz : {code}\n"))
+
+
+def send_bulk_sms(messages):  # kop SMS ni navbatga qoyadi, worker ularni guruhlab jonatadi
+    for message in messages:
+        sms_queue.put(message)
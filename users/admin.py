@@ -1,5 +1,5 @@
 from django.contrib import admin
-from users.models import User, UserConfirmation
+from users.models import User, UserConfirmation, UserFollow
 
 
 class UserAdmin(admin.ModelAdmin):
@@ -10,3 +10,4 @@ class UserAdmin(admin.ModelAdmin):
 
 admin.site.register(User, UserAdmin)
 admin.site.register(UserConfirmation)
+admin.site.register(UserFollow)
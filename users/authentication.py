@@ -0,0 +1,96 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from shared.db_router import PRIMARY
+from .models import User
+
+# endpointlar oqiydigan hamma maydonlar (photo, auth_type, email, counterlar ...) 1 ta yozuvda,
+# faqat parol hashi keshga yozilmaydi (kerak bolsa lazy yuklanadi)
+USER_RECORD_FIELDS = tuple(field.attname for field in User._meta.concrete_fields if field.attname != 'password')
+USER_CACHE_KEY = 'auth:user:{}'
+
+
+class LocalLRUCache:  # process ichidagi kichik LRU, redisgacha ham bormaslik un
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            item = self.data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self.data[key]
+                return None
+            self.data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.data[key] = (time.monotonic() + self.ttl, value)
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.data.pop(key, None)
+
+
+local_users = LocalLRUCache(maxsize=10000, ttl=settings.AUTH_USER_LOCAL_CACHE_TTL)
+
+
+def get_user_record(user_id):  # LRU -> redis -> baza
+    key = USER_CACHE_KEY.format(user_id)
+    record = local_users.get(key)
+    if record is None:
+        record = cache.get(key)
+        if record is None:
+            # primary dan: save() dan keyin replika hali eski bolsa eski yozuv keshda qolib ketmasin
+            record = User.objects.using(PRIMARY).filter(id=user_id).values(*USER_RECORD_FIELDS).first()
+            if record is None:
+                return None
+            cache.set(key, record, settings.AUTH_USER_CACHE_TTL)
+        local_users.set(key, record)
+    return record
+
+
+def invalidate_user_record(user_id):  # User.save()/delete() va UserQuerySet.update()/delete() chaqiradi, boshqa processlar LRU si TTL bilan eskiradi
+    key = USER_CACHE_KEY.format(user_id)
+    local_users.delete(key)
+    cache.delete(key)
+
+
+class CachedJWTAuthentication(JWTAuthentication):  # har bir requestda users jadvaliga bormaydi
+
+    def get_user(self, validated_token):
+        if getattr(api_settings, 'CHECK_REVOKE_TOKEN', False):  # parol hashi kerak, keshlanmaydi
+            return super(CachedJWTAuthentication, self).get_user(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        record = get_user_record(user_id)
+        if record is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if not record['is_active']:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        # parolsiz yuklangan user, save() ham faqat yuklangan/ozgargan maydonlarni yozadi
+        # from_db qiymatlarni modeldagi maydonlar tartibida kutadi
+        field_names = [field.attname for field in User._meta.concrete_fields if field.attname in record]
+        return User.from_db(router.db_for_read(User), field_names, [record[name] for name in field_names])
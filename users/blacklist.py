@@ -0,0 +1,113 @@
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+REVOKED_KEY = 'jwt:revoked:{}'
+
+
+class BloomFilter:  # "yoq" desa aniq yoq, "bor" desa redis/bazada tekshiriladi
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def positions(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'big'), int.from_bytes(digest[8:], 'big')
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, value):
+        for position in self.positions(value):
+            self.bits[position // 8] |= 1 << position % 8
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(self.bits[position // 8] & 1 << position % 8 for position in self.positions(value))
+
+
+class TokenBlacklist:
+    # SQL jadval asosiy manba, lekin har bir tekshiruv unga bormaydi:
+    # process ichidagi Bloom filter har JWT_BLACKLIST_SYNC_SECONDS da yangi qatorlarni id > oxirgi_id boyicha oladi,
+    # filter "bor" desa baza tekshiriladi (Bloom xatosi).
+    # ilova orqali revoke (logout, refresh rotation) redisdagi jti kalitiga yoziladi (TTL = token muddati) va
+    # har tekshiruvda shu kalit (1 ta GET) birinchi soraladi: boshqa processdagi logout darhol korinadi.
+    # id > oxirgi_id sync postgresda id lar commit tartibida bolmagani un qator otkazib yuborishi mumkin,
+    # shuning un filter faqat redisni chetlab otgan yollar un (admin, redis tozalangan), rebuild ularni ham tuzatadi
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.bloom = None
+        self.last_id = 0
+        self.synced_at = 0
+        self.rebuilt_at = 0
+
+    def rebuild(self):  # muddati otganlar filterdan chiqishi un vaqti-vaqti bilan qaytadan quriladi
+        rows = BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now()).order_by('id')
+        capacity = max(settings.JWT_BLACKLIST_BLOOM_CAPACITY, rows.count() * 2)
+        bloom = BloomFilter(capacity)
+        last_id = 0
+        for row_id, jti in rows.values_list('id', 'token__jti').iterator():
+            bloom.add(jti)
+            last_id = row_id
+        self.bloom, self.last_id = bloom, max(self.last_id, last_id)
+        self.rebuilt_at = self.synced_at = time.monotonic()
+
+    def sync(self):
+        now = time.monotonic()
+        if self.bloom is None or now - self.rebuilt_at > settings.JWT_BLACKLIST_REBUILD_SECONDS \
+                or self.bloom.count > self.bloom.capacity:  # toldi, xato foizi oshmasin
+            self.rebuild()
+            return
+        if now - self.synced_at < settings.JWT_BLACKLIST_SYNC_SECONDS:
+            return
+        new_rows = BlacklistedToken.objects.filter(id__gt=self.last_id).order_by('id') \
+            .values_list('id', 'token__jti')  # PK index boyicha, faqat yangi qatorlar
+        for row_id, jti in new_rows:
+            self.bloom.add(jti)
+            self.last_id = row_id
+        self.synced_at = now
+
+    def add(self, jti, expires_at):
+        timeout = max(1, int((expires_at - timezone.now()).total_seconds()))
+        cache.set(REVOKED_KEY.format(jti), True, timeout)
+        with self.lock:
+            if self.bloom is not None:
+                self.bloom.add(jti)
+
+    def is_revoked(self, jti):
+        if cache.get(REVOKED_KEY.format(jti)):  # ilova qilgan revoke lar, qaysi processda bolsa ham
+            return True
+        with self.lock:
+            self.sync()
+            if jti not in self.bloom:
+                return False
+        return BlacklistedToken.objects.filter(token__jti=jti).exists()  # Bloom xatosi
+
+
+token_blacklist = TokenBlacklist()
+
+
+class FastBlacklistRefreshToken(RefreshToken):
+
+    def check_blacklist(self):
+        if token_blacklist.is_revoked(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        blacklisted = super(FastBlacklistRefreshToken, self).blacklist()
+        token_blacklist.add(self.payload[api_settings.JTI_CLAIM], datetime_from_epoch(self.payload['exp']))
+        return blacklisted
@@ -0,0 +1,9 @@
+from shared.jobs import register_job
+from .models import User
+
+
+@register_job('process_user_photo')
+def process_user_photo(user_id):
+    user = User.objects.filter(pk=user_id).first()
+    if user is not None and user.photo:
+        user.process_photo()
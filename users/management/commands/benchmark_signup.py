@@ -0,0 +1,66 @@
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+from django.test.utils import CaptureQueriesContext
+
+from users.models import User, VIA_EMAIL
+
+EMAIL_DOMAIN = 'benchmark.invalid'
+
+
+class Command(BaseCommand):
+    # parallel signup: username generatsiyasi bazaga oldindan sorov yubormasligini va
+    # takrorlanish (IntegrityError -> qayta urinish) qanchalik kam bolishini olchaydi
+    help = "Sign up many users concurrently and report throughput, latency and queries per signup"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100000)
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--keep', action='store_true', help="Yaratilgan userlar ochirilmaydi")
+
+    def handle(self, *args, **options):
+        generated = []
+        original = User.generate_username
+        lock = threading.Lock()
+
+        def counting_generate_username():  # retry lar sonini bilish un
+            with lock:
+                generated.append(1)
+            return original()
+
+        def signup(_):
+            try:
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    User(email=f'{uuid.uuid4().hex}@{EMAIL_DOMAIN}', auth_type=VIA_EMAIL).save()
+                    return time.perf_counter() - start, len(queries)
+            finally:
+                close_old_connections()
+
+        User.generate_username = staticmethod(counting_generate_username)
+        try:
+            start = time.perf_counter()
+            with ThreadPoolExecutor(options['concurrency']) as pool:
+                results = list(pool.map(signup, range(options['users'])))
+            elapsed = time.perf_counter() - start
+        finally:
+            User.generate_username = staticmethod(original)
+
+        latencies = sorted(latency for latency, _ in results)
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        self.stdout.write(
+            f"{len(results)} ta signup, {options['concurrency']} parallel: {len(results) / elapsed:.0f} signup/s, "
+            f"p50 {statistics.median(latencies) * 1000:.2f} ms, p99 {p99 * 1000:.2f} ms"
+        )
+        self.stdout.write(
+            f"signup boshiga SQL (BEGIN/COMMIT bilan): {statistics.mean(count for _, count in results):.2f}, "
+            f"username takrorlanib qayta urinishlar: {len(generated) - len(results)}"
+        )
+        if not options['keep']:
+            deleted, _ = User.objects.filter(email__endswith=f'@{EMAIL_DOMAIN}').delete()
+            self.stdout.write(f"{deleted} ta yozuv ochirildi")
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+
+class Command(BaseCommand):  # muddati otgan refresh tokenlarni (va blacklistdagilarini) bolib-bolib ochiradi
+    help = "Delete expired outstanding/blacklisted JWT rows in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--sleep', type=float, default=0.1, help="Har bir batch orasida kutish (sekund)")
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        total = 0
+        while True:
+            ids = list(OutstandingToken.objects.filter(expires_at__lte=now).order_by('id')
+                       .values_list('id', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            OutstandingToken.objects.filter(id__in=ids).delete()  # BlacklistedToken cascade bilan ochadi
+            total += len(ids)
+            time.sleep(options['sleep'])  # bazani uzoq band qilmaslik un
+        self.stdout.write(self.style.SUCCESS(f"{total} ta eskirgan token ochirildi"))
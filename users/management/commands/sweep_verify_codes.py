@@ -0,0 +1,27 @@
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+
+from users.models import UserConfirmation
+
+
+class Command(BaseCommand):  # muddati otgan UserConfirmation qatorlarini bolib-bolib ochiradi (DatabaseCodeStore un)
+    help = "Delete expired verification codes in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--sleep', type=float, default=0.1, help="Har bir batch orasida kutish (sekund)")
+
+    def handle(self, *args, **options):
+        now = datetime.now()
+        total = 0
+        while True:
+            ids = list(UserConfirmation.objects.filter(expiration_time__lt=now).order_by('expiration_time')
+                       .values_list('id', flat=True)[:options['batch_size']])  # confirmation_expiration_idx
+            if not ids:
+                break
+            UserConfirmation.objects.filter(id__in=ids).delete()
+            total += len(ids)
+            time.sleep(options['sleep'])
+        self.stdout.write(self.style.SUCCESS(f"{total} ta eskirgan kod ochirildi"))
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.8 on 2026-10-18 18:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_user_photo_variants'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userconfirmation',
+            index=models.Index(fields=['expiration_time'], name='confirmation_expiration_idx'),
+        ),
+    ]
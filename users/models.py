@@ -2,19 +2,52 @@ import random
 import uuid
 from datetime import datetime, timedelta
 
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX, identify_hasher
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.core.validators import FileExtensionValidator
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from django.db.models.functions import Upper
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from shared.images import make_image_variants
 from shared.models import BaseModel
 
+USERNAME_RETRIES = 3
 ORDINARY_USER, MANAGER, ADMIN = ("ordinary_user", 'manager', 'admin')
 VIA_EMAIL, VIA_PHONE = ("via_email", "via_phone")
 NEW, CODE_VERIFIED, DONE, PHOTO_DONE = ('new', 'code_verified', 'done', 'photo_done')
 
 
+def invalidate_users_cache(user_ids):  # CachedJWTAuthentication keshidagi yozuvlar eskiradi
+    from users.authentication import invalidate_user_record  # authentication shu moduldan import qiladi
+    user_ids = list(user_ids)
+    transaction.on_commit(lambda: [invalidate_user_record(user_id) for user_id in user_ids])
+
+
+class UserQuerySet(models.QuerySet):
+    # update()/delete() save() ni chaqirmaydi (follow counterlari, admin bulk action), kesh shu yerda ham tozalanadi
+    # buning un ozgaradigan userlar id si oldindan 1 ta query bilan olinadi
+
+    def update(self, **kwargs):
+        user_ids = list(self.values_list('pk', flat=True))
+        rows = super(UserQuerySet, self).update(**kwargs)
+        invalidate_users_cache(user_ids)
+        return rows
+
+    def delete(self):
+        user_ids = list(self.values_list('pk', flat=True))
+        result = super(UserQuerySet, self).delete()
+        invalidate_users_cache(user_ids)
+        return result
+
+
+class CustomUserManager(UserManager.from_queryset(UserQuerySet)):  # migrationlar un nomli klass kerak
+    pass
+
+
 class User(AbstractUser, BaseModel):
+    objects = CustomUserManager()
+
     USER_ROLES = (
         (ORDINARY_USER, ORDINARY_USER),
         (MANAGER, MANAGER),
@@ -39,29 +72,41 @@ class User(AbstractUser, BaseModel):
     photo = models.ImageField(upload_to='user_photos/', null=True, blank=True,
                               validators=[
                                   FileExtensionValidator(allowed_extensions=['jpg', 'jpeg', 'png', 'heic', 'heif'])])
+    photo_variants = models.JSONField(default=dict, blank=True)  # thumbnail/feed/full -> fayl yoli
+    followers_count = models.PositiveIntegerField(default=0)  # fan-out qilish yoki qilmaslikni shu hal qiladi
+    following_count = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return self.username
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(Upper('username'), name='user_username_upper_idx'),  # username__iexact uchun
+            models.Index(Upper('email'), name='user_email_upper_idx'),  # email__iexact uchun
+        ]
+
     @property
     def full_name(self):
         return f"{self.first_name} {self.last_name}"
 
     def create_verify_code(self, verify_type):
+        from users.verification import get_code_store  # verification shu moduldan import qiladi
         code = "".join([str(random.randint(0, 10000) % 10) for _ in range(4)])
-        UserConfirmation.objects.create(
-            user_id=self.id,
-            verify_type=verify_type,
-            code=code
-        )
+        get_code_store().create(self, verify_type, code)  # redis (TTL bilan) yoki UserConfirmation jadvali
         return code
 
+    def process_photo(self):  # profil rasmidan kichik variantlar yasab saqlaydi
+        self.photo_variants, _, _ = make_image_variants(self.photo, self.photo_variants)
+        self.save(update_fields=['photo', 'photo_variants'])
+
+    @staticmethod
+    def generate_username():  # instagram-23324fsdf12a, 48 bit tasodifiy, bazaga sorov yoq
+        return f'instagram-{uuid.uuid4().hex[-12:]}'
+
     def check_username(self):
         if not self.username:
-            temp_username = f'instagram-{uuid.uuid4().__str__().split("-")[-1]}'  # instagram-23324fsdf
-            while User.objects.filter(username=temp_username):
-                temp_username = f"{temp_username}{random.randint(0, 9)}"
-            self.username = temp_username
+            self.username = self.generate_username()
+            self.username_generated = True  # takrorlansa save() yangisini yaratib qayta urinadi
 
     def check_email(self):
         if self.email:
@@ -69,12 +114,15 @@ class User(AbstractUser, BaseModel):
             self.email = normalize_email
 
     def check_pass(self):
-        if not self.password:
-            temp_password = f'password-{uuid.uuid4().__str__().split("-")[-1]}'  # 123456mfdsjfkd
-            self.password = temp_password
-
-    def hashing_password(self):
-        if not self.password.startswith('pbkdf2_sha256'):
+        if not self.password:  # yangi user hali parol qoymagan, hashlash (PBKDF2) shart emas
+            self.set_unusable_password()
+
+    def hashing_password(self):  # faqat xom parol berilgan bolsa hashlaydi, qaysi hasher ekanligi muhim emas
+        if self.password.startswith(UNUSABLE_PASSWORD_PREFIX):
+            return
+        try:
+            identify_hasher(self.password)  # PASSWORD_HASHERS dagi birortasining hashi
+        except ValueError:
             self.set_password(self.password)
 
     def token(self):
@@ -86,7 +134,30 @@ class User(AbstractUser, BaseModel):
 
     def save(self, *args, **kwargs):
         self.clean()
-        super(User, self).save(*args, **kwargs)
+        if not getattr(self, 'username_generated', False):
+            super(User, self).save(*args, **kwargs)
+            self.invalidate_cache()
+            return
+        # oldindan tekshirmaymiz, unique constraint buzilsa (juda kam) boshqa username bilan qayta yozamiz
+        for attempt in range(USERNAME_RETRIES):
+            try:
+                with transaction.atomic():
+                    super(User, self).save(*args, **kwargs)
+                break
+            except IntegrityError:
+                # boshqa sabab (masalan email band) bolsa qayta urinish foyda bermaydi
+                if attempt == USERNAME_RETRIES - 1 or not User.objects.filter(username=self.username).exists():
+                    raise
+                self.username = self.generate_username()
+        self.username_generated = False
+        self.invalidate_cache()
+
+    def invalidate_cache(self):
+        invalidate_users_cache([self.id])
+
+    def delete(self, *args, **kwargs):
+        self.invalidate_cache()
+        return super(User, self).delete(*args, **kwargs)
 
     def clean(self):
         self.check_email()
@@ -95,6 +166,19 @@ class User(AbstractUser, BaseModel):
         self.hashing_password()
 
 
+class UserFollow(BaseModel):  # follower -> following ga obuna bolgan
+    follower = models.ForeignKey('users.User', models.CASCADE, related_name='following')
+    following = models.ForeignKey('users.User', models.CASCADE, related_name='followers')
+
+    def __str__(self):
+        return f'{self.follower} follows {self.following}'
+
+    class Meta:
+        verbose_name = 'UserFollow'
+        verbose_name_plural = 'UserFollows'
+        unique_together = ('follower', 'following')
+
+
 PHONE_EXPIRE = 2
 EMAIL_EXPIRE = 5
 
@@ -110,6 +194,13 @@ class UserConfirmation(BaseModel):
     expiration_time = models.DateTimeField(null=True)
     is_confirmed = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # user.verify_codes.filter(is_confirmed=False, expiration_time__gte=..., code=...)
+            models.Index(fields=['user', 'is_confirmed', 'expiration_time'], name='confirmation_user_active_idx'),
+            models.Index(fields=['expiration_time'], name='confirmation_expiration_idx'),  # sweep_verify_codes un
+        ]
+
     def __str__(self):
         return str(self.user.__str__())
 
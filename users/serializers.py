@@ -1,4 +1,3 @@
-from django.contrib.auth import authenticate
 from django.contrib.auth.models import update_last_login
 from django.contrib.auth.password_validation import validate_password
 from django.core.validators import FileExtensionValidator
@@ -6,7 +5,9 @@ from rest_framework.generics import get_object_or_404
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
 from rest_framework_simplejwt.tokens import AccessToken
 
+from shared.jobs import enqueue
 from shared.utility import check_email_or_phone, send_email, send_phone_code, check_user_type
+from .blacklist import FastBlacklistRefreshToken
 from .models import User, UserConfirmation, VIA_EMAIL, VIA_PHONE, NEW, CODE_VERIFIED, DONE, PHOTO_DONE
 from rest_framework import exceptions
 from django.db.models import Q
@@ -41,8 +42,7 @@ class SignUpSerializer(serializers.ModelSerializer):
             send_email(user.email, code)
         elif user.auth_type == VIA_PHONE:
             code = user.create_verify_code(VIA_PHONE)
-            send_email(user.phone_number, code)  # sms paket yoqligi un emailda jonatib turamiz
-            # send_phone_code(user.phone_number, code)
+            send_phone_code(user.phone_number, code)  # SMS_BACKEND orqali, navbat bilan
         user.save()
         return user
 
@@ -162,9 +162,8 @@ class ChangeUserInfoSerializer(serializers.Serializer):
         instance.username = validated_data.get('username', instance.username)  # kirgizgan valid bolgan datalar
         instance.first_name = validated_data.get('first_name', instance.first_name)  # datadan kelgan malumotni brktr -
         instance.last_name = validated_data.get('last_name', instance.last_name)  # bolmasa random username qolsin
-        instance.password = validated_data.get('password', instance.password)
         if validated_data.get('password'):
-            instance.set_password(validated_data.get('password'))
+            instance.set_password(validated_data.get('password'))  # 1 marta hash, save() qayta hashlamaydi
         if instance.auth_status == CODE_VERIFIED:
             instance.auth_status = DONE
         instance.save()
@@ -182,6 +181,7 @@ class ChangeUserPhotoSerializer(serializers.Serializer):
             instance.photo = photo
             instance.auth_status = PHOTO_DONE
             instance.save()
+            enqueue('process_user_photo', user_id=str(instance.id))  # variantlarni worker yasaydi
         return instance
 
 
@@ -195,39 +195,36 @@ class LoginSerializer(TokenObtainPairSerializer):  # access va refresh token qay
 
     #
 
+    # user kiritgan qiymat turi -> qaysi maydon boyicha qidiriladi (iexact lar UPPER() indexdan foydalanadi)
+    lookup_fields = {
+        'email': 'email__iexact',  # Anora@gmail.com   -> anOra@gmail.com
+        'phone': 'phone_number',
+        'username': 'username__iexact',
+    }
+
     def auth_validate(self, data):  # valid bolgan datalarni oladi
         user_input = data.get('userinput')  # email, phone_number, username
-        if check_user_type(user_input) == 'username':
-            username = user_input
-        elif check_user_type(user_input) == "email":  # Anora@gmail.com   -> anOra@gmail.com
-            user = self.get_user(email__iexact=user_input)  # user get method orqali user o'zgartiruvchiga biriktirildi
-            username = user.username
-        elif check_user_type(user_input) == 'phone':
-            user = self.get_user(phone_number=user_input)  # bu  User.objects.get(phone_number=user_input) ga teng
-            username = user.username
-        else:
-            data = {
-                'success': True,
-                'message': "Siz email, username yoki telefon raqami jonatishingiz kerak"
-            }
-            raise TypeError(data)
+        lookup = self.lookup_fields[check_user_type(user_input)]  # turi 1 marta aniqlanadi
+        user = User.objects.filter(**{lookup: user_input}).first()  # user 1 ta query bilan olinadi
 
-        authentication_kwargs = {  # username va parolni aniladik
-            self.username_field: username,
-            'password': data['password']
-        }
+        if user is None:
+            User().set_password(data['password'])  # user bor-yoqligini javob vaqtidan bilib bolmasligi un
+            raise ValidationError(
+                {
+                    'success': False,
+                    'message': "Sorry, login or password you entered is incorrect. Please check and trg again!"
+                }
+            )
         # user statusi tekshirilishi kerak
-        current_user = User.objects.filter(username__iexact=username).first()  # None
-
-        if current_user is not None and current_user.auth_status in [NEW, CODE_VERIFIED]:
+        if user.auth_status in [NEW, CODE_VERIFIED]:
             raise ValidationError(
                 {
                     'success': False,
                     'message': "Siz royhatdan toliq otmagansiz!"
                 }
             )
-        user = authenticate(**authentication_kwargs)  # username=usrname, password=data['password'] ga teng -
-        if user is not None:  # buni yuqordan yozib qoyganmi,  authenticate da tekwramiz
+        # authenticate() userni qayta olmasin deb parolni shu yerda tekshiramiz, eski hash bolsa yangilanadi
+        if user.is_active and user.check_password(data['password']):
             self.user = user
         else:
             raise ValidationError(
@@ -246,18 +243,9 @@ class LoginSerializer(TokenObtainPairSerializer):  # access va refresh token qay
         data['full_name'] = self.user.full_name
         return data
 
-    def get_user(self, **kwargs):
-        users = User.objects.filter(**kwargs)
-        if not users.exists():
-            raise ValidationError(
-                {
-                    "message": "No active account found"
-                }
-            )
-        return users.first()
-
 
 class LoginRefreshSerializer(TokenRefreshSerializer):
+    token_class = FastBlacklistRefreshToken  # blacklist tekshiruvi har safar bazaga bormaydi
 
     def validate(self, attrs):
         data = super().validate(attrs)
@@ -1,3 +1,139 @@
-from django.test import TestCase
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.hashers import get_hasher
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from shared.testing import IndexUsageMixin
+
+from .authentication import CachedJWTAuthentication
+from .blacklist import FastBlacklistRefreshToken, TokenBlacklist
+from .models import User, UserConfirmation, DONE
+
+
+@override_settings(VERIFY_CODE_STORE='users.verification.DatabaseCodeStore')  # kodni bazadan oqish un
+class AuthCostTests(TestCase):  # har bir endpoint parolni ko'pi bilan 1 marta hashlaydi va 1 ta token yaratadi
+    password = 'Sup3r-secret!'
+
+    def setUp(self):
+        cache.clear()  # throttle hisoblagichlari testlar orasida qolmasin
+        self.client = APIClient()
+
+    @contextmanager
+    def count_calls(self):
+        hasher_class = type(get_hasher())
+        with mock.patch.object(hasher_class, 'encode', autospec=True, side_effect=hasher_class.encode) as encode, \
+                mock.patch.object(RefreshToken, 'for_user', side_effect=RefreshToken.for_user) as for_user:
+            yield encode, for_user
+
+    def request(self, method, url, data, hashes=1, tokens=1):  # ko'pi bilan
+        with self.count_calls() as (encode, for_user), self.captureOnCommitCallbacks(execute=True):
+            response = getattr(self.client, method)(url, data, format='json')  # on_commit: user keshi yangilanadi
+        self.assertLess(response.status_code, 300, response.data)
+        self.assertLessEqual(encode.call_count, hashes, f'{url}: parol hashlash soni')
+        self.assertLessEqual(for_user.call_count, tokens, f'{url}: yaratilgan refresh tokenlar soni')
+        return response.data
+
+    def authenticate(self, access):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+
+    def test_auth_flow(self):
+        data = self.request('post', '/users/signup/', {'email_phone_number': 'anora@gmail.com'}, hashes=0)
+        self.authenticate(data['access'])
+        user = User.objects.get(email='anora@gmail.com')
+        code = UserConfirmation.objects.get(user=user).code
+
+        data = self.request('post', '/users/verify/', {'code': code}, hashes=0)
+        self.authenticate(data['access_token'])
+
+        change = {
+            'first_name': 'Anora', 'last_name': 'Karimova', 'username': 'anora_k',
+            'password': self.password, 'confirm_password': self.password
+        }
+        self.request('put', '/users/change_user/', change, tokens=0)
+        self.assertEqual(User.objects.get(pk=user.pk).auth_status, DONE)
+
+        self.client.credentials()
+        # check_password ham hasher.encode orqali solishtiradi, shuning un 1 ta
+        self.request('post', '/users/login/', {'userinput': 'anora_k', 'password': self.password})
+
+        data = self.request('post', '/users/forgot_password/', {'email_or_phone': 'anora@gmail.com'}, hashes=0)
+        self.authenticate(data['access'])
+
+        new_password = 'N3w-secret!'
+        reset = {'password': new_password, 'confirm_password': new_password}
+        self.request('put', '/users/reset_password/', reset)
+        self.assertTrue(User.objects.get(pk=user.pk).check_password(new_password))
+
+
+class TokenBlacklistTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='anora_k', email='anora@gmail.com')
+
+    @override_settings(JWT_BLACKLIST_SYNC_SECONDS=3600)
+    def test_revoked_in_other_process(self):  # boshqa process logout qilgan, bu processning filteri eski
+        blacklist = TokenBlacklist()
+        token = FastBlacklistRefreshToken.for_user(self.user)
+        jti = token['jti']
+        self.assertFalse(blacklist.is_revoked(jti))
+        blacklist.last_id = 10 ** 9  # kechroq commit bolgan qator id > oxirgi_id sync ga tushmaydi
+        token.blacklist()
+        self.assertTrue(blacklist.is_revoked(jti))
+
+
+class CachedUserTests(TestCase):  # JWT user keshdan to'liq yuklanadi va bulk update dan keyin eskirmaydi
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='anora_k', email='anora@gmail.com', password='Sup3r-secret!')
+        self.token = AccessToken.for_user(self.user)
+        self.authentication = CachedJWTAuthentication()
+
+    def test_cached_user_has_all_fields(self):
+        self.authentication.get_user(self.token)  # keshni toldiradi
+        with self.assertNumQueries(0):
+            user = self.authentication.get_user(self.token)
+            self.assertEqual(
+                (user.email, user.auth_type, user.auth_status, user.followers_count, user.photo.name),
+                (self.user.email, self.user.auth_type, self.user.auth_status, 0, '')
+            )
+        with self.assertNumQueries(1):  # parol hashi keshlanmaydi
+            self.assertTrue(user.check_password('Sup3r-secret!'))
+
+    def test_queryset_update_invalidates(self):
+        self.authentication.get_user(self.token)
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(pk=self.user.pk).update(followers_count=5)
+        self.assertEqual(self.authentication.get_user(self.token).followers_count, 5)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(pk=self.user.pk).update(is_active=False)
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.get_user(self.token)
+
+
+class IndexUsageTests(IndexUsageMixin, TestCase):  # asosiy querylar index orqali ishlaydi
+
+    def test_login_username_lookup(self):  # LoginSerializer.auth_validate
+        self.assertIndexScan(User.objects.filter(username__iexact='Anora'), 'user_username_upper_idx')
+
+    def test_login_email_lookup(self):
+        self.assertIndexScan(User.objects.filter(email__iexact='Anora@gmail.com'), 'user_email_upper_idx')
+
+    def test_verify_code_lookup(self):  # DatabaseCodeStore.consume
+        queryset = UserConfirmation.objects.filter(
+            user_id=uuid.uuid4(), code='1234', is_confirmed=False, expiration_time__gte=datetime.now()
+        )
+        self.assertIndexScan(queryset, 'confirmation_user_active_idx')
+
+    def test_expired_codes_sweep(self):  # sweep_verify_codes
+        queryset = UserConfirmation.objects.filter(expiration_time__lt=datetime.now()).order_by('expiration_time')
+        self.assertIndexScan(queryset, 'confirmation_expiration_idx')
@@ -1,6 +1,6 @@
 from django.urls import path
 from .views import CreateUserView, VerifyCodeView, GetNewVerification, ChangeUserInformationView, ChangeUserPhotoView, \
-    LoginView, LoginRefreshView, LogoutView, ForgotPasswordView, ResetPasswordView
+    LoginView, LoginRefreshView, LogoutView, ForgotPasswordView, ResetPasswordView, FollowView
 
 urlpatterns = [
     path('login/', LoginView.as_view()),
@@ -13,4 +13,5 @@ urlpatterns = [
     path('change_user_photo/', ChangeUserPhotoView.as_view()),
     path('forgot_password/', ForgotPasswordView.as_view()),
     path('reset_password/', ResetPasswordView.as_view()),
+    path('follow/<uuid:pk>/', FollowView.as_view()),
 ]
@@ -0,0 +1,109 @@
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+from .models import UserConfirmation, VIA_EMAIL, EMAIL_EXPIRE, PHONE_EXPIRE
+
+CODE_KEY = 'verify:{}:code'  # userning bitta amaldagi kodi
+ATTEMPTS_KEY = 'verify:{}:attempts'
+
+# kod togri bolsa ochiradi: GET + solishtirish + DEL bitta atomik amal, ikki parallel sorovdan faqat bittasi otadi
+CONSUME_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def code_ttl(verify_type):  # sekund
+    return (EMAIL_EXPIRE if verify_type == VIA_EMAIL else PHONE_EXPIRE) * 60
+
+
+def redis_client():  # django_redis bolmasa (locmem) None
+    get_client = getattr(getattr(cache, 'client', None), 'get_client', None)
+    return get_client(write=True) if get_client else None
+
+
+class BaseCodeStore:
+
+    def create(self, user, verify_type, code):
+        raise NotImplementedError
+
+    def consume(self, user, code):  # kod togri bolsa ishlatib yuboradi (qayta ishlamaydi), True/False
+        raise NotImplementedError
+
+    def has_active(self, user):
+        raise NotImplementedError
+
+    def expire(self, user):
+        raise NotImplementedError
+
+    def too_many_attempts(self, user):
+        # har bir tekshiruv sanaladi, limitdan oshsa kod bekor. Yangi kod hisoblagichni nolga tushirmaydi,
+        # aks holda har qayta sorash yana VERIFY_CODE_MAX_ATTEMPTS urinish beradi. Faqat togri kod yoki TTL tozalaydi
+        key = ATTEMPTS_KEY.format(user.id)
+        cache.add(key, 0, timeout=code_ttl(user.auth_type))
+        try:
+            attempts = cache.incr(key)
+        except ValueError:  # shu orada TTL tugagan
+            cache.set(key, 1, timeout=code_ttl(user.auth_type))
+            attempts = 1
+        return attempts > settings.VERIFY_CODE_MAX_ATTEMPTS
+
+    def reset_attempts(self, user):
+        cache.delete(ATTEMPTS_KEY.format(user.id))
+
+
+class CacheCodeStore(BaseCodeStore):
+    # userga bitta kalit, ichida kod: yangi kod eskisini almashtiradi, redis TTL bilan ozi ochadi, bazaga yozilmaydi
+
+    def create(self, user, verify_type, code):
+        cache.set(CODE_KEY.format(user.id), code, timeout=code_ttl(verify_type))
+
+    def consume(self, user, code):
+        if not code:
+            return False
+        key = CODE_KEY.format(user.id)
+        client = redis_client()
+        if client is not None:
+            consume = client.register_script(CONSUME_SCRIPT)
+            return consume(keys=[cache.make_key(key)], args=[cache.client.encode(str(code))]) == 1
+        # locmem (test, lokal): bitta process, atomik bolishi shart emas
+        if cache.get(key) != str(code):
+            return False
+        cache.delete(key)
+        return True
+
+    def has_active(self, user):
+        return cache.get(CODE_KEY.format(user.id)) is not None
+
+    def expire(self, user):
+        cache.delete(CODE_KEY.format(user.id))
+
+
+class DatabaseCodeStore(BaseCodeStore):
+    # redis yoq joylar un, eskirgan qatorlarni sweep_verify_codes buyrugi ochiradi
+
+    def create(self, user, verify_type, code):
+        UserConfirmation.objects.create(user_id=user.id, verify_type=verify_type, code=code)
+
+    def consume(self, user, code):  # bitta UPDATE, exists() + update() orasidagi poyga yoq
+        return UserConfirmation.objects.filter(
+            user_id=user.id, code=code, is_confirmed=False, expiration_time__gte=datetime.now()
+        ).update(is_confirmed=True) > 0
+
+    def has_active(self, user):
+        return UserConfirmation.objects.filter(
+            user_id=user.id, is_confirmed=False, expiration_time__gte=datetime.now()
+        ).exists()
+
+    def expire(self, user):
+        UserConfirmation.objects.filter(user_id=user.id, is_confirmed=False).update(expiration_time=datetime.now())
+
+
+def get_code_store():
+    return import_string(settings.VERIFY_CODE_STORE)()
+
@@ -1,31 +1,40 @@
-from datetime import datetime
-from tokenize import TokenError
 
-from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models import F
 from django.shortcuts import render
 from rest_framework import permissions, status
-from rest_framework.generics import CreateAPIView, UpdateAPIView
+from rest_framework.generics import CreateAPIView, UpdateAPIView, get_object_or_404
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.exceptions import TokenError
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
-from shared.utility import send_email, check_user_type, check_email_or_phone
-from .models import User, NEW, CODE_VERIFIED, DONE, VIA_EMAIL, VIA_PHONE
+from shared.db import insert_ignore_conflict
+from shared.throttling import IPThrottle, UserThrottle, TargetThrottle
+from shared.utility import send_email, send_phone_code, check_user_type, check_email_or_phone
+from post.timeline import backfill_timeline, remove_from_timeline
+from .blacklist import FastBlacklistRefreshToken
+from .verification import get_code_store
+from .models import User, UserFollow, NEW, CODE_VERIFIED, DONE, VIA_EMAIL, VIA_PHONE
 from .serializers import SignUpSerializer, ChangeUserInfoSerializer, ChangeUserPhotoSerializer, LoginSerializer, \
     LoginRefreshSerializer, LogoutSerializer, ForgotPasswordSerializer, ResetPasswordSerializer
 from rest_framework.response import Response
-from rest_framework.exceptions import ValidationError, NotFound
+from rest_framework.exceptions import ValidationError
 
 
 class CreateUserView(CreateAPIView):
     queryset = User.objects.all()
     permission_classes = [permissions.AllowAny]
     serializer_class = SignUpSerializer
+    throttle_classes = [IPThrottle, TargetThrottle]  # har signup kod yaratib email/sms yuboradi
+    throttle_scope = 'signup'
+    throttle_target_fields = ('email_phone_number',)
 
 
 class VerifyCodeView(APIView):  # codni tasdiqlash
     permission_classes = (IsAuthenticated,)
+    throttle_classes = [IPThrottle, UserThrottle]  # 4 xonali kodni terib topishga qarshi
+    throttle_scope = 'verify'
 
     def post(self, request, *args, **kwargs):
 
@@ -33,27 +42,31 @@ class VerifyCodeView(APIView):  # codni tasdiqlash
         code = self.request.data.get('code')
 
         self.check_verify(user, code)
+        tokens = user.token()  # har bir token() yangi RefreshToken yaratadi, 1 marta chaqiramiz
         return Response(
             data={
                 "success": True,
                 "auth_status": user.auth_status,
-                "access_token": user.token()["access"],
-                "refresh_token": user.token()["refresh_token"]
+                "access_token": tokens["access"],
+                "refresh_token": tokens["refresh_token"]
             }
         )
 
     @staticmethod
     def check_verify(user, code):
-        verified = user.verify_codes.filter(expiration_time__gte=datetime.now(), code=code,
-                                            # user.verify_codes, related name bilan boglangan
-                                            is_confirmed=False)  # is_confirmed biror amalni tasdiqlashni bildradi
-        if not verified.exists():
+        store = get_code_store()
+        if store.too_many_attempts(user):
+            store.expire(user)  # kod bekor, yangisini sorash mumkin
+            data = {
+                "message": "Urinishlar soni oshib ketdi. Birozdan keyin yangi kod oling!"
+            }
+            raise ValidationError(data)
+        if not store.consume(user, code):  # togri kod bir marta ishlatiladi
             data = {
                 "message": "Tasdiqlash kodingiz xato yoki eskirgan"
             }
             raise ValidationError(data)
-        else:
-            verified.update(is_confirmed=True)
+        store.reset_attempts(user)
 
         if user.auth_status == NEW:
             user.auth_status = CODE_VERIFIED
@@ -68,11 +81,11 @@ class GetNewVerification(APIView):
         user = request.user
         self.check_verification(user)
         if user.auth_type == VIA_EMAIL:
-            code = user.customer.email(VIA_EMAIL)
+            code = user.create_verify_code(VIA_EMAIL)
             send_email(user.email, code)
         elif user.auth_type == VIA_PHONE:
             code = user.create_verify_code(VIA_PHONE)
-            send_email(user.phone_number, code)
+            send_phone_code(user.phone_number, code)
         else:
             data = {
                 "message": "Email yoki telefon raqam notog'ri!"
@@ -87,8 +100,7 @@ class GetNewVerification(APIView):
 
     @staticmethod
     def check_verification(user):
-        verifies = user.verify_codes.filter(expiration_time__gte=datetime.now(), is_confirmed=False)
-        if verifies.exists():
+        if get_code_store().has_active(user):
             data = {
                 "message": "Kodingiz hali ishlatish uchun yaroqli. Biroz kuting!"
             }
@@ -143,6 +155,9 @@ class ChangeUserPhotoView(APIView):
 
 class LoginView(TokenObtainPairView):  # login qilyotgan userda tokenlar yoq wunga permission yozmadik
     serializer_class = LoginSerializer
+    throttle_classes = [IPThrottle, TargetThrottle]
+    throttle_scope = 'login'
+    throttle_target_fields = ('userinput',)
 
 
 class LoginRefreshView(TokenRefreshView):  # refresh tokeni olib access tokeni yanglaydi
@@ -158,8 +173,8 @@ class LogoutView(APIView):
         serializer.is_valid(raise_exception=True)
 
         try:
-            refresh_token = serializer.validated_data.get("refresh_token")
-            token = RefreshToken(refresh_token)
+            refresh_token = serializer.validated_data.get("refresh")
+            token = FastBlacklistRefreshToken(refresh_token)
             token.blacklist()
             data = {
                 "success": True,
@@ -177,6 +192,9 @@ class LogoutView(APIView):
 class ForgotPasswordView(APIView):
     permission_classes = [AllowAny, ]
     serializer_class = ForgotPasswordSerializer
+    throttle_classes = [IPThrottle, TargetThrottle]
+    throttle_scope = 'forgot'
+    throttle_target_fields = ('email_or_phone',)
 
     def post(self, request, *args, **kwargs):
         serializer = self.serializer_class(data=self.request.data)
@@ -185,17 +203,18 @@ class ForgotPasswordView(APIView):
         user = serializer.validated_data.get("user")
         if check_email_or_phone(email_or_phone) == "phone":
             code = user.create_verify_code(VIA_PHONE)
-            send_email(email_or_phone, code)
+            send_phone_code(email_or_phone, code)
         elif check_email_or_phone(email_or_phone) == "email":
             code = user.create_verify_code(VIA_EMAIL)
             send_email(email_or_phone, code)
 
+        tokens = user.token()
         return Response(
             {
                 "success": True,
                 "message": "Tasdiqlash kodi muvaffaqiyatlik yuborildi!",
-                "access": user.token()['access'],
-                "refresh": user.token()['refresh_token'],
+                "access": tokens['access'],
+                "refresh": tokens['refresh_token'],
                 "user_status": user.auth_status
             }, status=status.HTTP_200_OK
         )
@@ -210,17 +229,49 @@ class ResetPasswordView(UpdateAPIView):
         return self.request.user  # request jonatgan user
 
     def update(self, request, *args, **kwargs):
-        response = super(ResetPasswordView, self).update(request, *args, **kwargs)
-        try:
-            user = User.objects.get(id=response.data.get('id'))
-        except ObjectDoesNotExist as e:
-            raise NotFound(detail="User not found")
-
+        super(ResetPasswordView, self).update(request, *args, **kwargs)
+        tokens = self.request.user.token()  # update qilingan user, bazadan qayta olish shart emas
         return Response(
             {
                 "success": True,
                 "message": "Parolingiz muvaffaqiyatlik o'zgartirildi",
-                "access": user.token()['access'],
-                "refresh": user.token()['refresh_token']
+                "access": tokens['access'],
+                "refresh": tokens['refresh_token']
             }, status=status.HTTP_200_OK
         )
+
+
+class FollowView(APIView):  # userga follow qilish va ochrish
+    permission_classes = [IsAuthenticated]
+
+    @transaction.atomic
+    def post(self, request, pk):
+        following = get_object_or_404(User, pk=pk)
+        if following.id == request.user.id:
+            raise ValidationError({"success": False, "message": "O'zingizga follow qila olmaysiz"})
+        deleted, _ = UserFollow.objects.filter(follower=request.user, following=following).delete()
+        if deleted:
+            User.objects.filter(pk=following.id).update(followers_count=F('followers_count') - 1)
+            User.objects.filter(pk=request.user.id).update(following_count=F('following_count') - 1)
+            remove_from_timeline(request.user, following)
+            data = {
+                "success": True,
+                "message": "Follow muvofaqiyatlik o'chrildi",
+            }
+            return Response(data, status=status.HTTP_204_NO_CONTENT)
+
+        # INSERT ... ON CONFLICT DO NOTHING: parallel ikki follow IntegrityError (500) bermaydi
+        if not insert_ignore_conflict(UserFollow(follower=request.user, following=following), 'following'):
+            data = {
+                "success": True,
+                "message": "Follow muvofaqiyatlik qo'shildi",
+            }
+            return Response(data, status=status.HTTP_200_OK)  # boshqa request allaqachon qoshgan, sonlar ozgarmaydi
+        User.objects.filter(pk=following.id).update(followers_count=F('followers_count') + 1)
+        User.objects.filter(pk=request.user.id).update(following_count=F('following_count') + 1)
+        backfill_timeline(request.user, following)
+        data = {
+            "success": True,
+            "message": "Follow muvofaqiyatlik qo'shildi",
+        }
+        return Response(data, status=status.HTTP_201_CREATED)